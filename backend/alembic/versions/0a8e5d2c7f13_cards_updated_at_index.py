@@ -0,0 +1,25 @@
+"""cards_updated_at_index
+
+Revision ID: 0a8e5d2c7f13
+Revises: f6a0d3c19b57
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0a8e5d2c7f13'
+down_revision: Union[str, None] = 'f6a0d3c19b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_cards_updated_at', 'cards', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cards_updated_at', table_name='cards')
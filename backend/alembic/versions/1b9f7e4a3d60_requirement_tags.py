@@ -0,0 +1,123 @@
+"""requirement_tags
+
+Revision ID: 1b9f7e4a3d60
+Revises: 0a8e5d2c7f13
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import re
+
+import sqlalchemy as sa
+
+
+revision: str = '1b9f7e4a3d60'
+down_revision: Union[str, None] = '0a8e5d2c7f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of app.services.tags.TAG_ALIASES / normalize_tag as of this revision
+TAG_ALIASES = {
+    "wifi": "good_internet",
+    "fast_wifi": "good_internet",
+    "fast_internet": "good_internet",
+    "internet": "good_internet",
+    "quiet_area": "quiet",
+    "walkability": "walkable",
+    "safe": "safe_at_night",
+    "coworking": "coworking_near",
+}
+
+tags_table = sa.table("tags", sa.column("id", sa.Integer), sa.column("name", sa.String))
+
+
+def normalize_tag(raw):
+    if not raw:
+        return None
+    name = re.sub(r"[\s\-/]+", "_", raw.strip().lower())
+    name = re.sub(r"[^\w]", "", name).strip("_")
+    if not name:
+        return None
+    return TAG_ALIASES.get(name, name)[:80]
+
+
+def normalize_tags(raw_tags):
+    names = []
+    for raw in raw_tags or []:
+        name = normalize_tag(raw)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_tags(bind) -> None:
+    """Link existing questions and cards to tags from their JSON requirements, in id batches."""
+    tag_ids = dict(bind.execute(sa.select(tags_table.c.name, tags_table.c.id)).all())
+    for table_name, link_table_name, key in (
+        ("questions", "question_tags", "question_id"),
+        ("cards", "card_tags", "card_id"),
+    ):
+        source = sa.table(table_name, sa.column("id", sa.Integer), sa.column("requirements", sa.JSON))
+        link_table = sa.table(link_table_name, sa.column(key, sa.Integer), sa.column("tag_id", sa.Integer))
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(source.c.id, source.c.requirements)
+                .where(source.c.id > last_id)
+                .order_by(source.c.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            names_by_id = {row.id: normalize_tags(row.requirements) for row in rows}
+            missing = sorted({name for names in names_by_id.values() for name in names} - tag_ids.keys())
+            if missing:
+                bind.execute(tags_table.insert(), [{"name": name} for name in missing])
+                tag_ids.update(
+                    bind.execute(
+                        sa.select(tags_table.c.name, tags_table.c.id).where(tags_table.c.name.in_(missing))
+                    ).all()
+                )
+            links = [
+                {key: entity_id, "tag_id": tag_ids[name]}
+                for entity_id, names in names_by_id.items()
+                for name in names
+            ]
+            if links:
+                bind.execute(link_table.insert(), links)
+            last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tags",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=80), nullable=False, unique=True),
+    )
+    op.create_table(
+        "question_tags",
+        sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id"), primary_key=True),
+        sa.Column("tag_id", sa.Integer(), sa.ForeignKey("tags.id"), primary_key=True),
+    )
+    op.create_index("ix_question_tags_tag_id_question_id", "question_tags", ["tag_id", "question_id"])
+    op.create_table(
+        "card_tags",
+        sa.Column("card_id", sa.Integer(), sa.ForeignKey("cards.id"), primary_key=True),
+        sa.Column("tag_id", sa.Integer(), sa.ForeignKey("tags.id"), primary_key=True),
+    )
+    op.create_index("ix_card_tags_tag_id_card_id", "card_tags", ["tag_id", "card_id"])
+
+    # Batched backfill from the JSON requirements columns
+    backfill_tags(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index("ix_card_tags_tag_id_card_id", table_name="card_tags")
+    op.drop_table("card_tags")
+    op.drop_index("ix_question_tags_tag_id_question_id", table_name="question_tags")
+    op.drop_table("question_tags")
+    op.drop_table("tags")
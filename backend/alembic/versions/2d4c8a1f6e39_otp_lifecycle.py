@@ -0,0 +1,30 @@
+"""otp_lifecycle
+
+Revision ID: 2d4c8a1f6e39
+Revises: 1b9f7e4a3d60
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '2d4c8a1f6e39'
+down_revision: Union[str, None] = '1b9f7e4a3d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('otp_codes', sa.Column('used_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_otp_codes_email_code_created_at', 'otp_codes', ['email', 'code', 'created_at'])
+    op.create_index('ix_otp_codes_expires_at', 'otp_codes', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_otp_codes_expires_at', table_name='otp_codes')
+    op.drop_index('ix_otp_codes_email_code_created_at', table_name='otp_codes')
+    with op.batch_alter_table('otp_codes') as batch_op:
+        batch_op.drop_column('used_at')
@@ -0,0 +1,41 @@
+"""feed_keyset_pagination
+
+Revision ID: 3c7d2e91a4b0
+Revises: 649aac93f9c1
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3c7d2e91a4b0'
+down_revision: Union[str, None] = '649aac93f9c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('last_activity_at', sa.DateTime(), nullable=True))
+    op.execute(
+        """
+        UPDATE questions
+        SET last_activity_at = COALESCE(
+            (SELECT MAX(answers.created_at) FROM answers WHERE answers.question_id = questions.id),
+            questions.created_at
+        )
+        """
+    )
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.alter_column('last_activity_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_questions_last_activity_at_id', 'questions', ['last_activity_at', 'id'])
+    op.create_index('ix_answers_question_id_created_at', 'answers', ['question_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_answers_question_id_created_at', table_name='answers')
+    op.drop_index('ix_questions_last_activity_at_id', table_name='questions')
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.drop_column('last_activity_at')
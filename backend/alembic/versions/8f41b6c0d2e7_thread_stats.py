@@ -0,0 +1,45 @@
+"""thread_stats
+
+Revision ID: 8f41b6c0d2e7
+Revises: 3c7d2e91a4b0
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '8f41b6c0d2e7'
+down_revision: Union[str, None] = '3c7d2e91a4b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('last_message_at', sa.DateTime(), nullable=True))
+    op.add_column('questions', sa.Column('answer_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('questions', sa.Column('vote_score', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        """
+        UPDATE questions
+        SET last_message_at = (
+                SELECT MAX(answers.created_at) FROM answers WHERE answers.question_id = questions.id
+            ),
+            answer_count = (
+                SELECT COUNT(answers.id) FROM answers WHERE answers.question_id = questions.id
+            ),
+            vote_score = (
+                SELECT COUNT(reactions.id) FROM reactions
+                WHERE reactions.entity_type = 'question' AND reactions.entity_id = questions.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.drop_column('vote_score')
+        batch_op.drop_column('answer_count')
+        batch_op.drop_column('last_message_at')
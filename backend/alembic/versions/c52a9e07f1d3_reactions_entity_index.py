@@ -0,0 +1,25 @@
+"""reactions_entity_index
+
+Revision ID: c52a9e07f1d3
+Revises: 8f41b6c0d2e7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c52a9e07f1d3'
+down_revision: Union[str, None] = '8f41b6c0d2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reactions_entity', 'reactions', ['entity_type', 'entity_id', 'reaction_type'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reactions_entity', table_name='reactions')
@@ -0,0 +1,46 @@
+"""user_stats
+
+Revision ID: d913f4a6b8c2
+Revises: c52a9e07f1d3
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd913f4a6b8c2'
+down_revision: Union[str, None] = 'c52a9e07f1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("helped_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("saves_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cards_used", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        INSERT INTO user_stats (user_id, helped_count, saves_count, cards_used)
+        SELECT users.id,
+            (SELECT COUNT(reactions.id) FROM reactions JOIN answers ON answers.id = reactions.entity_id
+             WHERE reactions.entity_type = 'answer' AND reactions.reaction_type = 'helped'
+               AND answers.user_id = users.id),
+            (SELECT COUNT(reactions.id) FROM reactions JOIN answers ON answers.id = reactions.entity_id
+             WHERE reactions.entity_type = 'answer' AND reactions.reaction_type = 'save'
+               AND answers.user_id = users.id),
+            (SELECT COUNT(card_sources.id) FROM card_sources JOIN answers ON answers.id = card_sources.answer_id
+             WHERE answers.user_id = users.id)
+        FROM users
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
@@ -0,0 +1,29 @@
+"""profile_indexes
+
+Revision ID: e27c8b5f0a94
+Revises: d913f4a6b8c2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e27c8b5f0a94'
+down_revision: Union[str, None] = 'd913f4a6b8c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_questions_author_id_created_at', 'questions', ['author_id', 'created_at'])
+    op.create_index('ix_answers_user_id_created_at', 'answers', ['user_id', 'created_at'])
+    op.create_index('ix_reactions_user_id_reaction_type', 'reactions', ['user_id', 'reaction_type', 'entity_type'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reactions_user_id_reaction_type', table_name='reactions')
+    op.drop_index('ix_answers_user_id_created_at', table_name='answers')
+    op.drop_index('ix_questions_author_id_created_at', table_name='questions')
@@ -0,0 +1,163 @@
+"""full_text_search
+
+Revision ID: f6a0d3c19b57
+Revises: e27c8b5f0a94
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f6a0d3c19b57'
+down_revision: Union[str, None] = 'e27c8b5f0a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The only place the Postgres search columns are created. Each ALTER rewrites the whole table under an
+# ACCESS EXCLUSIVE lock (reads and writes wait until it finishes) to compute the stored column, and each
+# CREATE INDEX blocks writes while it builds; on large tables run this in a maintenance window
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE questions ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', coalesce(question_text, ''))) STORED
+    """,
+    """
+    ALTER TABLE answers ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', coalesce(answer_text, ''))) STORED
+    """,
+    """
+    ALTER TABLE cards ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector(
+            'simple',
+            coalesce(title, '') || ' ' || coalesce(summary, '') || ' ' || coalesce(recommendations::text, '')
+        )
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_questions_search_vector ON questions USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_answers_search_vector ON answers USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_cards_search_vector ON cards USING GIN (search_vector)",
+]
+
+# Frozen copy of app.models.search (SQLite) as of this revision; later schema changes get their own migration
+_SQLITE_CARD_BODY = (
+    "coalesce(new.summary, '') || ' ' || "
+    "coalesce((SELECT group_concat(value, ' ') FROM json_each(new.recommendations)), '')"
+)
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body,
+        entity_type UNINDEXED, question_id UNINDEXED, city_id UNINDEXED, topic_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_ai AFTER INSERT ON questions BEGIN
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        VALUES (new.id * 4 + 1, '', new.question_text, 'question', new.id, new.city_id, new.topic_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_au
+    AFTER UPDATE OF question_text, city_id, topic_id ON questions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        VALUES (new.id * 4 + 1, '', new.question_text, 'question', new.id, new.city_id, new.topic_id);
+        UPDATE search_index SET city_id = new.city_id, topic_id = new.topic_id
+        WHERE rowid IN (SELECT id * 4 + 2 FROM answers WHERE question_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_ad AFTER DELETE ON questions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_answers_ai AFTER INSERT ON answers BEGIN
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        SELECT new.id * 4 + 2, '', new.answer_text, 'answer', new.question_id, questions.city_id, questions.topic_id
+        FROM questions WHERE questions.id = new.question_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_answers_au AFTER UPDATE OF answer_text ON answers BEGIN
+        UPDATE search_index SET body = new.answer_text WHERE rowid = new.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_answers_ad AFTER DELETE ON answers BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_cards_ai AFTER INSERT ON cards
+    WHEN new.status = 'PUBLISHED' BEGIN
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        VALUES (new.id * 4 + 3, new.title, {_SQLITE_CARD_BODY}, 'card', NULL, new.city_id, new.topic_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_cards_au AFTER UPDATE ON cards BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        SELECT new.id * 4 + 3, new.title, {_SQLITE_CARD_BODY}, 'card', NULL, new.city_id, new.topic_id
+        WHERE new.status = 'PUBLISHED';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_cards_ad AFTER DELETE ON cards BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+    END
+    """,
+]
+
+SQLITE_SEARCH_REBUILD = [
+    "DELETE FROM search_index",
+    """
+    INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+    SELECT id * 4 + 1, '', question_text, 'question', id, city_id, topic_id FROM questions
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+    SELECT answers.id * 4 + 2, '', answers.answer_text, 'answer', answers.question_id,
+        questions.city_id, questions.topic_id
+    FROM answers JOIN questions ON questions.id = answers.question_id
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+    SELECT id * 4 + 3, title,
+        coalesce(summary, '') || ' ' ||
+        coalesce((SELECT group_concat(value, ' ') FROM json_each(cards.recommendations)), ''),
+        'card', NULL, city_id, topic_id
+    FROM cards WHERE status = 'PUBLISHED'
+    """,
+]
+
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DDL + SQLITE_SEARCH_REBUILD:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for table in ("questions", "answers", "cards"):
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for table in ("questions", "answers", "cards"):
+            for suffix in ("ai", "au", "ad"):
+                op.execute(f"DROP TRIGGER IF EXISTS search_{table}_{suffix}")
+        op.execute("DROP TABLE IF EXISTS search_index")
@@ -1,37 +1,86 @@
+import hmac
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import SessionLocal
-from app.core.security import verify_access_token
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, SessionLocal
+from app.core.tracing import trace_span
 from app.models.models import User
+from app.services.principals import Principal, load_user, resolve_token
 
 # Define the scheme BEFORE using it
 oauth2_scheme = HTTPBearer()
+metrics_scheme = HTTPBearer(auto_error=False)
 
 
 def get_db():
+    # The session is lazy: the pool checkout is traced by app.core.pool on the first statement
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        # rollback and return of the connection to the pool
+        with trace_span("get_db close", "dependency"):
+            db.close()
+
 
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
 
-def get_current_user(db: Session = Depends(get_db), token_auth: HTTPBearer = Depends(oauth2_scheme)) -> User:
+
+def get_current_principal(
+    db: Session = Depends(get_db), token_auth: HTTPBearer = Depends(oauth2_scheme)
+) -> Principal:
+    """The caller as seen by the token; touches the database only for pre-claims tokens."""
     try:
         # HTTPBearer returns an object, the actual token is in .credentials
-        token = token_auth.credentials
-        email = verify_access_token(token)
-    except Exception as exc:
+        with trace_span("get_current_principal", "dependency"):
+            principal = resolve_token(db, token_auth.credentials)
+    except JWTError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
-    user = db.query(User).filter(User.email == email).first()
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return principal
+
+
+def get_current_user(
+    db: Session = Depends(get_db), principal: Principal = Depends(get_current_principal)
+) -> User:
+    """The ORM row of the caller, for handlers that need more than the principal."""
+    with trace_span("get_current_user", "dependency"):
+        user = db.get(User, principal.user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
 
 
-def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
-    if not current_user.is_admin:
+def get_admin_user(
+    db: Session = Depends(get_db), principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    # The claim rejects most callers for free; the cached row catches revoked admins
+    with trace_span("get_admin_user", "dependency"):
+        user = load_user(db, user_id=principal.user_id) if principal.is_admin else None
+    if not user or not user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-    return current_user
+    return user
+
+
+def verify_metrics_access(token_auth: Optional[HTTPAuthorizationCredentials] = Depends(metrics_scheme)) -> None:
+    """Scrapers present METRICS_TOKEN; without one configured, metrics stay private outside development."""
+    if not settings.metrics_token:
+        if settings.environment != "development":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+        return
+    presented = token_auth.credentials.encode() if token_auth is not None else b""
+    if not hmac.compare_digest(presented, settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
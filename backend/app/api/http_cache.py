@@ -0,0 +1,47 @@
+import hashlib
+from datetime import datetime
+
+from fastapi import Request, Response, status
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def strong_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def version_etag(*parts) -> str:
+    """ETag from a validator such as (entity id, updated_at) instead of the body bytes."""
+    return '"%s"' % "-".join(
+        value.isoformat() if isinstance(value, datetime) else str(value) for value in parts
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2), so a W/ prefix still matches
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in header.split(","))
+    return etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+
+def not_modified(request: Request, etag: str, cache_control: str):
+    """A 304 for a matching If-None-Match, otherwise None."""
+    if not etag_matches(request, etag):
+        return None
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def cached_json_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """Serve an already serialized JSON body with validators, or a 304 if the client has it."""
+    return not_modified(request, etag, cache_control) or Response(
+        content=body,
+        media_type=JSON_MEDIA_TYPE,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
@@ -0,0 +1,242 @@
+"""Per-request timing: Server-Timing header, a structured log line, query budgets
+and the HTTP request metrics served on /metrics.
+
+Phases reported for each request:
+- db: time inside cursor.execute, and the statement count (app.core.query_stats)
+- handler: the endpoint function itself, without dependencies
+- serialize: from the endpoint returning until the response starts, i.e.
+  response_model validation, JSON rendering and dependency teardown
+- total: the whole request as seen by the middleware
+
+Statements a streaming response runs after its headers went out are still in
+the log line, but not in the header.
+
+A TRACE_SAMPLE_RATE fraction of requests also gets the same phases, every SQL
+statement, response_model validation and the traced dependencies as a Chrome
+trace file (app.core.tracing).
+"""
+import json
+import logging
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Dict, get_args, get_origin
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.query_stats import RequestStats, current_request_stats
+from app.core.tracing import RequestTrace, should_trace, trace_span, write_trace
+
+logger = logging.getLogger("travel_decision.requests")
+
+
+def _parse_budgets(raw: str) -> Dict[str, int]:
+    budgets = {}
+    for item in raw.split(","):
+        route, _, limit = item.strip().rpartition("=")
+        if route:
+            budgets[route.strip()] = int(limit)
+    return budgets
+
+
+QUERY_BUDGETS = _parse_budgets(settings.query_budgets)
+
+
+def query_budget(route: str) -> int:
+    return QUERY_BUDGETS.get(route, settings.query_budget_default)
+
+
+def _timed(endpoint):
+    # The wrapper keeps the endpoint's signature (via __wrapped__) and its sync/async kind,
+    # so FastAPI resolves parameters and picks the threadpool exactly as before
+    if getattr(endpoint, "request_timed", False):
+        # include_router rebuilds routes from their (already wrapped) endpoints
+        return endpoint
+
+    def finish(stats: RequestStats, started: float) -> None:
+        stats.handler_finished_at = time.perf_counter()
+        stats.handler_seconds += stats.handler_finished_at - started
+        if stats.trace is not None:
+            stats.trace.complete(
+                f"handler {endpoint.__name__}", "handler", started, stats.handler_finished_at - started
+            )
+
+    if iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            stats = current_request_stats.get()
+            if stats is None:
+                return await endpoint(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                finish(stats, started)
+    else:
+        @wraps(endpoint)
+        def timed_endpoint(*args, **kwargs):
+            stats = current_request_stats.get()
+            if stats is None:
+                return endpoint(*args, **kwargs)
+            started = time.perf_counter()
+            profile = stats.profile
+            if profile is not None:
+                # threadpool thread: sample it while it works on this request
+                profile.attach()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    profile.detach()
+                finish(stats, started)
+    timed_endpoint.request_timed = True
+    return timed_endpoint
+
+
+def _type_name(annotation) -> str:
+    args = get_args(annotation)
+    if not args:
+        return getattr(annotation, "__name__", str(annotation))
+    origin = get_origin(annotation)
+    return f"{getattr(origin, '__name__', origin)}[{', '.join(_type_name(arg) for arg in args)}]"
+
+
+def _trace_response_field(field) -> None:
+    # serialize_response calls field.validate and field.serialize; shadow both on this route's field
+    if getattr(field, "request_traced", False):
+        return
+    name = _type_name(field.type_)
+    validate, serialize = field.validate, field.serialize
+
+    def traced_validate(value, *args, **kwargs):
+        count = {"count": len(value)} if isinstance(value, (list, tuple)) else {}
+        with trace_span(f"{name} response validation", "serialize", **count):
+            return validate(value, *args, **kwargs)
+
+    def traced_serialize(value, *args, **kwargs):
+        with trace_span(f"{name} response serialization", "serialize"):
+            return serialize(value, *args, **kwargs)
+
+    field.validate, field.serialize = traced_validate, traced_serialize
+    field.request_traced = True
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that times its endpoint and names the request after its path template."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed(endpoint), **kwargs)
+        self.timing_name = f"{'|'.join(sorted(self.methods))} {self.path_format}"
+        # The handler is built from secure_cloned_response_field, the same object as response_field on Pydantic 2
+        for field in (self.response_field, self.secure_cloned_response_field):
+            if field is not None:
+                _trace_response_field(field)
+
+    def matches(self, scope):
+        match, child_scope = super().matches(scope)
+        stats = current_request_stats.get()
+        # Starlette keeps scanning after a PARTIAL (method mismatch) and answers 405 from the first one,
+        # unless a later route matches fully
+        if stats is not None and (match == Match.FULL or (match == Match.PARTIAL and stats.route is None)):
+            stats.route = self.timing_name
+        return match, child_scope
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware, so the context variable is visible to the whole request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        if should_trace():
+            stats.trace = RequestTrace(scope["method"], scope["path"])
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        serialize_seconds = 0.0
+
+        async def send_with_timing(message):
+            nonlocal status_code, serialize_seconds
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                status_code = message["status"]
+                if stats.handler_finished_at is not None:
+                    serialize_seconds = now - stats.handler_finished_at
+                    if stats.trace is not None:
+                        stats.trace.complete("serialize", "serialize", stats.handler_finished_at, serialize_seconds)
+                if settings.request_timing_enabled:
+                    server_timing = (
+                        f'db;dur={_ms(stats.db_seconds)};desc="{stats.queries} queries", '
+                        f"handler;dur={_ms(stats.handler_seconds)}, "
+                        f"serialize;dur={_ms(serialize_seconds)}, "
+                        f"total;dur={_ms(now - started)}"
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            total_seconds = time.perf_counter() - started
+            route = self._route(scope, stats)
+            self._record_metrics(scope, route, stats, status_code, total_seconds)
+            if settings.request_timing_enabled:
+                self._log(scope, route, stats, status_code, serialize_seconds, total_seconds)
+            if stats.trace is not None:
+                await self._write_trace(stats.trace, route, status_code, started, total_seconds)
+
+    @staticmethod
+    def _route(scope, stats: RequestStats) -> str:
+        if stats.route is not None:
+            return stats.route
+        # Plain Starlette routes (docs, openapi.json) have fixed paths; anything else found no route
+        return f"{scope['method']} {scope['path']}" if "endpoint" in scope else "unmatched"
+
+    @staticmethod
+    async def _write_trace(trace: RequestTrace, route: str, status_code: int, started: float, total_seconds: float):
+        trace.complete(route, "request", started, total_seconds, {"path": trace.path, "status": status_code})
+        try:
+            await run_in_threadpool(write_trace, trace, route)
+        except OSError:
+            logging.getLogger("travel_decision").exception("Could not write the trace of %s", route)
+
+    @staticmethod
+    def _record_metrics(scope, route: str, stats: RequestStats, status_code: int, total_seconds: float):
+        # Label by path template (method is its own label), never the raw path
+        path = route.partition(" ")[2] or route
+        metrics.http_requests.inc(scope["method"], path, status_code)
+        metrics.http_request_duration.observe(total_seconds, scope["method"], path)
+        metrics.http_request_queries.observe(stats.queries, scope["method"], path)
+
+    @staticmethod
+    def _log(scope, route: str, stats: RequestStats, status_code: int, serialize_seconds: float, total_seconds: float):
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status_code,
+            "queries": stats.queries,
+            "db_ms": _ms(stats.db_seconds),
+            "handler_ms": _ms(stats.handler_seconds),
+            "serialize_ms": _ms(serialize_seconds),
+            "total_ms": _ms(total_seconds),
+        }
+        logger.info(json.dumps(record))
+        budget = query_budget(route)
+        if budget and stats.queries > budget:
+            logger.warning(json.dumps({"event": "query_budget_exceeded", "budget": budget, **record}))
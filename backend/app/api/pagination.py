@@ -0,0 +1,79 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort key of the last row of a page into an opaque URL-safe token."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Inverse of encode_cursor; `types` describes each key (datetime, int, ...)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("cursor shape mismatch")
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, payload)
+        )
+    except (ValueError, TypeError, binascii.Error) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def keyset_order(keys) -> list:
+    """ORDER BY clauses for `keys`, a list of (expression, descending) pairs."""
+    return [expression.desc() if descending else expression.asc() for expression, descending in keys]
+
+
+def keyset_filter(keys, values):
+    """WHERE clause selecting rows strictly after `values` in keyset_order(keys)."""
+    clauses = []
+    for index, ((expression, descending), value) in enumerate(zip(keys, values)):
+        equal_prefix = [prefix == prior for (prefix, _), prior in zip(keys[:index], values[:index])]
+        clauses.append(and_(*equal_prefix, expression < value if descending else expression > value))
+    return or_(*clauses)
+
+
+def _page(query, keys, limit: int, cursor: Optional[str]):
+    if cursor:
+        types = [expression.type.python_type for expression, _ in keys]
+        query = query.filter(keyset_filter(keys, decode_cursor(cursor, *types)))
+    return query.order_by(*keyset_order(keys)).limit(limit)
+
+
+def _next_cursor(rows, keys, limit: int) -> Optional[str]:
+    if len(rows) < limit:
+        return None
+    return encode_cursor(*(getattr(rows[-1], expression.key) for expression, _ in keys))
+
+
+def paginate(query, keys, limit: int, cursor: Optional[str] = None):
+    """Fetch one keyset page of an entity query ordered by `keys` (plain mapped columns).
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = _page(query, keys, limit, cursor).all()
+    return rows, _next_cursor(rows, keys, limit)
+
+
+async def paginate_async(db, statement, keys, limit: int, cursor: Optional[str] = None):
+    """paginate() for a select() of one entity on an AsyncSession."""
+    rows = (await db.scalars(_page(statement, keys, limit, cursor))).all()
+    return rows, _next_cursor(rows, keys, limit)
@@ -0,0 +1,96 @@
+"""Admin-only profiling of single requests.
+
+An admin adds `X-Profile: 1` (or `?_profile=1`) to any request. The request
+then runs normally under the sampling profiler from app.core.profiler, and the
+response carries an `X-Profile-Id` header. The profile is fetched afterwards
+from /admin/profiles/{id} as speedscope JSON or collapsed stacks.
+
+The trigger is checked with the regular get_current_principal/get_admin_user
+dependencies; for anyone else it is ignored and the request runs unprofiled.
+Requests without the trigger pay one header lookup.
+"""
+import logging
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.api.deps import get_admin_user, get_current_principal
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.profiler import RequestProfile, profile_store
+from app.core.query_stats import current_request_stats
+
+logger = logging.getLogger("travel_decision")
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_FLAG = "_profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+def _wants_profile(scope, headers: Headers) -> bool:
+    if headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    flag = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(PROFILE_QUERY_FLAG)
+    return bool(flag) and flag[0].lower() in ("1", "true", "yes")
+
+
+def _is_admin(authorization: str) -> bool:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    db = SessionLocal()
+    try:
+        principal = get_current_principal(
+            db=db, token_auth=HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+        )
+        get_admin_user(db=db, principal=principal)
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+    return True
+
+
+class RequestProfilerMiddleware:
+    """Runs inside RequestTimingMiddleware, whose RequestStats carries the profile."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        stats = current_request_stats.get()
+        if stats is None or not _wants_profile(scope, headers):
+            await self.app(scope, receive, send)
+            return
+        if not await run_in_threadpool(_is_admin, headers.get("authorization", "")):
+            logger.warning("Ignored profiling request from a non-admin on %s", scope["path"])
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], settings.profile_interval_ms / 1000)
+        stats.profile = profile
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.lower().encode(), profile.id.encode())
+                ]
+            await send(message)
+
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.stop()
+            stats.profile = None
+            profile.route = stats.route
+            profile_store.add(profile)
+            logger.info("Profiled %s %s as %s", scope["method"], scope["path"], profile.id)
@@ -0,0 +1,214 @@
+"""Sliding-window rate limiting, checked before a handler touches the database.
+
+A policy allows `limit` hits per `window_seconds` for each key (a user id, a
+client IP, an email). Hits are kept in memory per worker by default; set
+RATE_LIMIT_REDIS_URL to share the windows between workers through Redis
+(requires the `redis` package).
+
+`counted_on_success` takes a hit back when the guarded block fails, for quotas
+that should only count what was actually created. `warm_up` seeds an in-memory
+window from a durable record the first time a worker sees a key, so a restart
+doesn't hand out a fresh quota; after that the window alone decides.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.api.deps import get_current_principal
+from app.core.config import settings
+from app.services.principals import Principal
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    limit: int
+    window_seconds: float
+    detail: str = "Too many requests"
+
+
+class MemoryBackend:
+    """Exact sliding window: the last `limit` hit times per key, in one process."""
+
+    # Drop idle keys every this many hits so one-off clients don't accumulate
+    SWEEP_EVERY = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Tuple[float, Deque[Tuple[float, str]]]] = {}
+        self._since_sweep = 0
+
+    def hit(self, key: str, limit: int, window_seconds: float, member: str) -> Optional[float]:
+        """Record hit `member`; returns None if allowed, else seconds until the oldest hit leaves the window."""
+        now = time.monotonic()
+        with self._lock:
+            self._since_sweep += 1
+            if self._since_sweep >= self.SWEEP_EVERY:
+                self._sweep(now)
+            if key not in self._windows:
+                self._windows[key] = (window_seconds, deque(maxlen=limit))
+            _, hits = self._windows[key]
+            while hits and hits[0][0] <= now - window_seconds:
+                hits.popleft()
+            if len(hits) >= limit:
+                return hits[0][0] + window_seconds - now
+            hits.append((now, member))
+            return None
+
+    def warm(self, key: str, limit: int, window_seconds: float, load_ages: Callable[[], Iterable[float]]) -> None:
+        """Seed a key this process has no window for with hits made `load_ages()` seconds ago."""
+        with self._lock:
+            if key in self._windows:
+                return
+        # Outside the lock: load_ages usually queries the database
+        ages = sorted((age for age in load_ages() if age < window_seconds), reverse=True)
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._windows:
+                hits = deque(((now - age, "warm-up") for age in ages), maxlen=limit)
+                self._windows[key] = (window_seconds, hits)
+
+    def release(self, key: str, member: str) -> None:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None:
+                hits = window[1]
+                for hit in hits:
+                    if hit[1] == member:
+                        hits.remove(hit)
+                        break
+
+    def _sweep(self, now: float) -> None:
+        stale = [
+            key for key, (window_seconds, hits) in self._windows.items()
+            if not hits or hits[-1][0] <= now - window_seconds
+        ]
+        for key in stale:
+            del self._windows[key]
+        self._since_sweep = 0
+
+
+class RedisBackend:
+    """The same sliding window kept in a Redis sorted set, shared by every worker."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed") from exc
+        self._client = redis.Redis.from_url(url)
+
+    def hit(self, key: str, limit: int, window_seconds: float, member: str) -> Optional[float]:
+        now = time.time()
+        redis_key = f"ratelimit:{key}"
+        # Add first, then count, in one MULTI so concurrent workers can't both slip under the limit
+        pipe = self._client.pipeline()
+        pipe.zremrangebyscore(redis_key, 0, now - window_seconds)
+        pipe.zadd(redis_key, {member: now})
+        pipe.zcard(redis_key)
+        pipe.zrange(redis_key, 0, 0, withscores=True)
+        pipe.expire(redis_key, math.ceil(window_seconds))
+        _, _, count, oldest, _ = pipe.execute()
+        if count > limit:
+            self._client.zrem(redis_key, member)
+            return oldest[0][1] + window_seconds - now
+        return None
+
+    def release(self, key: str, member: str) -> None:
+        self._client.zrem(f"ratelimit:{key}", member)
+
+
+def _make_backend():
+    if settings.rate_limit_redis_url:
+        return RedisBackend(settings.rate_limit_redis_url)
+    return MemoryBackend()
+
+
+backend = _make_backend()
+
+
+def is_shared() -> bool:
+    """Whether windows are shared by all workers (and survive restarts)."""
+    return isinstance(backend, RedisBackend)
+
+
+def too_many_requests(policy: RateLimitPolicy, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=policy.detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def enforce(policy: RateLimitPolicy, key) -> Optional[str]:
+    """Count a hit for `key` under `policy`; 429 with Retry-After once the window is full.
+
+    Returns the hit's id, for `release`.
+    """
+    if not settings.rate_limit_enabled:
+        return None
+    member = f"{time.time():.6f}:{uuid4().hex}"
+    retry_after = backend.hit(f"{policy.name}:{key}", policy.limit, policy.window_seconds, member)
+    if retry_after is not None:
+        raise too_many_requests(policy, retry_after)
+    return member
+
+
+def warm_up(policy: RateLimitPolicy, key, load_ages: Callable[[], Iterable[float]]) -> None:
+    """Seed this worker's window for `key` from `load_ages` (seconds since each past hit), once.
+
+    Only the in-memory backend needs it: Redis windows outlive restarts. Windows
+    stay per worker afterwards, so with several workers and no Redis a quota
+    is enforced per worker, not exactly.
+    """
+    if settings.rate_limit_enabled and not is_shared():
+        backend.warm(f"{policy.name}:{key}", policy.limit, policy.window_seconds, load_ages)
+
+
+def release(policy: RateLimitPolicy, key, member: Optional[str]) -> None:
+    """Take back a hit recorded by `enforce`."""
+    if member is not None:
+        backend.release(f"{policy.name}:{key}", member)
+
+
+@contextmanager
+def counted_on_success(policy: RateLimitPolicy, key):
+    """Count a hit up front, so concurrent requests can't overshoot, and release it if the block raises."""
+    member = enforce(policy, key)
+    try:
+        yield
+    except BaseException:
+        release(policy, key, member)
+        raise
+
+
+def client_ip(request: Request) -> str:
+    # uvicorn rewrites request.client from X-Forwarded-For only for the proxy addresses in FORWARDED_ALLOW_IPS;
+    # trusting "*" would take the client-supplied leftmost entry and let anyone pick their own rate-limit key
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(policy: RateLimitPolicy) -> Callable:
+    """Dependency applying `policy` per client IP."""
+
+    def dependency(request: Request) -> None:
+        enforce(policy, client_ip(request))
+
+    return dependency
+
+
+def limit_by_principal(policy: RateLimitPolicy) -> Callable:
+    """Dependency applying `policy` per authenticated user; yields the principal to the handler."""
+
+    def dependency(principal: Principal = Depends(get_current_principal)) -> Principal:
+        enforce(policy, principal.user_id)
+        return principal
+
+    return dependency
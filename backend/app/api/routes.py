@@ -3,13 +3,35 @@ import random
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-
-from app.api.deps import get_admin_user, get_current_user, get_db
+from sqlalchemy import and_, case, func, or_, select
+
+from app.api.deps import get_admin_user, get_async_db, get_current_principal, get_db
+from app.api.http_cache import cached_json_response, not_modified, version_etag
+from app.api.instrumentation import TimedRoute
+from app.api import rate_limit
+from app.api.rate_limit import RateLimitPolicy, enforce, limit_by_ip, limit_by_principal
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    keyset_order,
+    paginate,
+    paginate_async,
+)
+from app.api.streaming import ndjson_response, set_next_cursor, wants_ndjson
+from app.core import metrics, tracing
 from app.core.config import settings
+from app.core.profiler import profile_store
 from app.core.security import create_access_token
+from app.core.slow_queries import slow_query_log
 from app.models.enums import (
     BudgetTier,
     CardStatus,
@@ -22,16 +44,19 @@ from app.models.models import (
     Answer,
     Card,
     CardSource,
+    CardTag,
     City,
     OtpCode,
     Question,
+    QuestionTag,
     Reaction,
     Report,
     Topic,
     User,
     UserProfile,
+    UserStats,
 )
-from app.schemas.common import AnswerBase, CardBase, CityBase, QuestionBase, TopicBase
+from app.schemas.common import AnswerBase, CardBase, CityBase, QuestionBase, ReportBase, TopicBase
 from app.schemas.requests import (
     AnswerCreate,
     CardUpdate,
@@ -42,10 +67,23 @@ from app.schemas.requests import (
     ReactionCreate,
     ReportCreate,
 )
+from app.services import accounts, ingest, otp, search, tags, thread_stats, user_stats
+from app.services.card_index import card_index
+from app.services.principals import Principal
+from app.services.reference_data import reference_cache
 
 logger = logging.getLogger("travel_decision")
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Лимиты проверяются до первого запроса в БД
+QUESTION_POLICY = RateLimitPolicy("questions", limit=3, window_seconds=24 * 3600, detail="Daily question limit reached")
+FEED_THREAD_POLICY = RateLimitPolicy("feed-threads", limit=5, window_seconds=3600)
+# Ответы анонимные, email автора ничем не подтвержден: лимит только на IP клиента, с запасом на NAT
+ANSWER_POLICY = RateLimitPolicy("answers", limit=60, window_seconds=3600)
+REACTION_POLICY = RateLimitPolicy("reactions", limit=60, window_seconds=60)
+OTP_IP_POLICY = RateLimitPolicy("otp-ip", limit=10, window_seconds=3600)
+OTP_EMAIL_POLICY = RateLimitPolicy("otp-email", limit=3, window_seconds=600)
 
 
 @router.get("/health")
@@ -53,33 +91,42 @@ def health_check():
     return {"status": "ok"}
 
 @router.get("/feed")
-def get_feed(limit: int = 20, offset: int = 0, db: Session = Depends(get_db)):
-    # Берем вопросы (это наши треды) + дату последнего ответа (как last_message_at)
-    last_answer_sq = (
-        db.query(
-            Answer.question_id.label("question_id"),
-            func.max(Answer.created_at).label("last_message_at"),
-        )
-        .group_by(Answer.question_id)
-        .subquery()
-    )
-
-    rows = (
-        db.query(
+async def get_feed(
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Треды сортируются по last_activity_at (время последнего ответа или создания),
+    # пагинация по курсору (last_activity_at, id) идет по индексу без OFFSET.
+    # Счетчики берутся из денормализованных колонок questions (см. services.thread_stats)
+    limit = clamp_limit(limit)
+    stmt = (
+        select(
             Question.id,
             Question.question_text,
             Question.created_at,
+            Question.last_activity_at,
+            Question.last_message_at,
+            Question.answer_count,
+            Question.vote_score,
             User.id.label("author_id"),
             User.email.label("author_name"),
-            last_answer_sq.c.last_message_at,
         )
         .join(User, User.id == Question.author_id)
-        .outerjoin(last_answer_sq, last_answer_sq.c.question_id == Question.id)
-        .order_by(func.coalesce(last_answer_sq.c.last_message_at, Question.created_at).desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
     )
+    if cursor:
+        cursor_ts, cursor_id = decode_cursor(cursor, datetime, int)
+        stmt = stmt.where(
+            or_(
+                Question.last_activity_at < cursor_ts,
+                and_(Question.last_activity_at == cursor_ts, Question.id < cursor_id),
+            )
+        )
+    elif offset:
+        stmt = stmt.offset(offset)
+    stmt = stmt.order_by(Question.last_activity_at.desc(), Question.id.desc()).limit(limit)
+    rows = (await db.execute(stmt)).all()
 
     items = []
     for r in rows:
@@ -91,13 +138,18 @@ def get_feed(limit: int = 20, offset: int = 0, db: Session = Depends(get_db)):
                 "created_at": r.created_at.isoformat() if r.created_at else None,
                 "last_message_at": r.last_message_at.isoformat() if r.last_message_at else None,
                 "author": {"id": r.author_id, "display_name": r.author_name},
+                "answer_count": r.answer_count,
+                "vote_score": r.vote_score,
             }
         )
 
-    return {"items": items}
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].last_activity_at, rows[-1].id)
+    return {"items": items, "next_cursor": next_cursor}
 
 
-@router.post("/feed")
+@router.post("/feed", dependencies=[Depends(limit_by_ip(FEED_THREAD_POLICY))])
 def create_feed_thread(payload: dict, db: Session = Depends(get_db)):
     """
     MVP: создаем публичный тред без авторизации.
@@ -107,51 +159,31 @@ def create_feed_thread(payload: dict, db: Session = Depends(get_db)):
     if not text:
         raise HTTPException(status_code=400, detail="question_text is required")
 
-    # 1) гарантируем что есть юзер "member@travel.dev"
-    user = db.query(User).filter(User.email == "member@travel.dev").first()
-    if not user:
-        user = User(email="member@travel.dev")
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-        if not db.query(UserProfile).filter(UserProfile.user_id == user.id).first():
-            db.add(UserProfile(user_id=user.id, cities_of_experience=[]))
-            db.commit()
-
-    # 2) гарантируем что есть city + topic для MVP
-    city = db.query(City).first()
-    if not city:
-        city = City(name="Tashkent", country="Uzbekistan")
-        db.add(city)
-        db.commit()
-        db.refresh(city)
-
-    topic = db.query(Topic).first()
-    if not topic:
-        topic = Topic(name="Remote work")
-        db.add(topic)
-        db.commit()
-        db.refresh(topic)
-
+    # дефолтные юзер/город/тема кэшируются в процессе, так что обычно это один INSERT
+    now = datetime.utcnow()
     q = Question(
-        city_id=city.id,
-        topic_id=topic.id,
-        author_id=user.id,
+        city_id=accounts.default_city_id(db),
+        topic_id=accounts.default_topic_id(db),
+        author_id=accounts.default_member_id(db),
         duration="2 months",
         budget_tier=BudgetTier.mid,
         requirements=[],
         question_text=text,
         status=QuestionStatus.open,
-        created_at=datetime.utcnow(),
+        created_at=now,
+        last_activity_at=now,
     )
     db.add(q)
+    db.flush()
+    question_id = q.id
     db.commit()
-    db.refresh(q)
+    metrics.questions_created.inc("feed")
 
-    return {"id": q.id}
+    return {"id": question_id}
 
-@router.post("/auth/request-otp")
+@router.post("/auth/request-otp", dependencies=[Depends(limit_by_ip(OTP_IP_POLICY))])
 def request_otp(payload: OtpRequest, db: Session = Depends(get_db)):
+    enforce(OTP_EMAIL_POLICY, payload.email.lower())
     code = "".join(str(random.randint(0, 9)) for _ in range(6))
     expires_at = datetime.utcnow() + timedelta(minutes=settings.otp_expire_minutes)
     db.add(OtpCode(email=payload.email, code=code, expires_at=expires_at))
@@ -162,25 +194,12 @@ def request_otp(payload: OtpRequest, db: Session = Depends(get_db)):
 
 @router.post("/auth/verify-otp")
 def verify_otp(payload: OtpVerify, db: Session = Depends(get_db)):
-    otp = (
-        db.query(OtpCode)
-        .filter(OtpCode.email == payload.email, OtpCode.code == payload.code)
-        .order_by(OtpCode.created_at.desc())
-        .first()
-    )
-    if not otp or otp.expires_at < datetime.utcnow():
+    # код гасится в той же транзакции, что и создание пользователя
+    if not otp.consume_code(db, payload.email, payload.code):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP")
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user:
-        user = User(email=payload.email)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
-    if not profile:
-        db.add(UserProfile(user_id=user.id, cities_of_experience=[]))
-        db.commit()
-    token = create_access_token(user.email)
+    user = accounts.ensure_user(db, payload.email)
+    db.commit()
+    token = create_access_token(user.email, user_id=user.id, is_admin=user.is_admin)
     logger.info("User verified OTP %s", user.email)
     return {"access_token": token, "token_type": "bearer", "user_id": user.id}
 
@@ -193,70 +212,98 @@ def login_simple(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     Simplified login for Swagger UI: get bearer token by email (username field).
     """
     email = form_data.username  # OAuth2 form uses 'username' field
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        user = User(email=email)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
-    if not profile:
-        db.add(UserProfile(user_id=user.id, cities_of_experience=[]))
-        db.commit()
+    user = accounts.ensure_user(db, email)
+    db.commit()
 
-    token = create_access_token(user.email)
+    token = create_access_token(user.email, user_id=user.id, is_admin=user.is_admin)
     logger.info("User logged in via simple auth: %s", user.email)
     return {"access_token": token, "token_type": "bearer"}
 
 
+REFERENCE_CACHE_CONTROL = f"public, max-age={settings.reference_cache_seconds}"
+CARD_CACHE_CONTROL = "public, no-cache"
+
+
+def _dump_list(schema, rows) -> bytes:
+    adapter = TypeAdapter(List[schema])
+    with tracing.trace_span(f"{schema.__name__} list dump_json", "serialize", count=len(rows)):
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
 @router.get("/cities", response_model=List[CityBase])
-def list_cities(db: Session = Depends(get_db)):
-    return db.query(City).order_by(City.name.asc()).all()
+def list_cities(request: Request, db: Session = Depends(get_db)):
+    # справочник меняется раз в месяц: отдаем готовые байты из кэша процесса
+    body, etag = reference_cache.get(
+        "cities", lambda: _dump_list(CityBase, db.query(City).order_by(City.name.asc()).all())
+    )
+    return cached_json_response(request, body, etag, REFERENCE_CACHE_CONTROL)
 
 
 @router.get("/topics", response_model=List[TopicBase])
-def list_topics(db: Session = Depends(get_db)):
-    return db.query(Topic).order_by(Topic.name.asc()).all()
+def list_topics(request: Request, db: Session = Depends(get_db)):
+    body, etag = reference_cache.get(
+        "topics", lambda: _dump_list(TopicBase, db.query(Topic).order_by(Topic.name.asc()).all())
+    )
+    return cached_json_response(request, body, etag, REFERENCE_CACHE_CONTROL)
 
 
-@router.post("/questions", response_model=QuestionBase)
-def create_question(
-    payload: QuestionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    recent_cutoff = datetime.utcnow() - timedelta(hours=24)
-    recent_count = (
-        db.query(Question)
-        .filter(Question.author_id == current_user.id, Question.created_at >= recent_cutoff)
-        .count()
+def _recent_question_ages(db: Session, user_id: int) -> List[float]:
+    """Seconds since each of the user's questions inside the quota window, to warm the limiter after a restart."""
+    now = datetime.utcnow()
+    rows = (
+        db.query(Question.created_at)
+        .filter(
+            Question.author_id == user_id,
+            Question.created_at >= now - timedelta(seconds=QUESTION_POLICY.window_seconds),
+        )
+        .order_by(Question.created_at.desc())
+        .limit(QUESTION_POLICY.limit)
+        .all()
     )
-    if recent_count >= 3:
-        raise HTTPException(status_code=429, detail="Daily question limit reached")
+    return [(now - created_at).total_seconds() for (created_at,) in rows]
+
+
+def _insert_question(db: Session, payload: QuestionCreate, current_user: Principal) -> Question:
+    now = datetime.utcnow()
     question = Question(
         city_id=payload.city_id,
         topic_id=payload.topic_id,
-        author_id=current_user.id,
+        author_id=current_user.user_id,
         duration=payload.duration,
         budget_tier=BudgetTier(payload.budget_tier),
         requirements=payload.requirements,
         question_text=payload.question_text,
+        created_at=now,
+        last_activity_at=now,
     )
     db.add(question)
+    db.flush()
+    tags.set_question_tags(db, question.id, payload.requirements)
     db.commit()
     db.refresh(question)
-    logger.info("Question created %s by %s", question.id, current_user.email)
     return question
 
 
-@router.get("/questions", response_model=List[QuestionBase])
-def list_questions(
-    city_id: Optional[int] = None,
-    topic_id: Optional[int] = None,
-    status_filter: Optional[str] = None,
+@router.post("/questions", response_model=QuestionBase)
+def create_question(
+    payload: QuestionCreate,
     db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
+    # Таблица вопросов читается один раз на пользователя и процесс, дальше квоту ведет лимитер
+    rate_limit.warm_up(QUESTION_POLICY, current_user.user_id, lambda: _recent_question_ages(db, current_user.user_id))
+    # Квота считает только созданные вопросы: при любой ошибке попытка возвращается
+    with rate_limit.counted_on_success(QUESTION_POLICY, current_user.user_id):
+        question = _insert_question(db, payload, current_user)
+    logger.info("Question created %s by %s", question.id, current_user.email)
+    metrics.questions_created.inc("api")
+    return question
+
+
+QUESTION_LIST_KEYS = [(Question.created_at, True), (Question.id, True)]
+
+
+def _questions_query(db: Session, city_id, topic_id, status_filter, requirements):
     query = db.query(Question)
     if city_id:
         query = query.filter(Question.city_id == city_id)
@@ -264,92 +311,148 @@ def list_questions(
         query = query.filter(Question.topic_id == topic_id)
     if status_filter:
         query = query.filter(Question.status == QuestionStatus(status_filter))
-    return query.order_by(Question.created_at.desc()).all()
+    if requirements:
+        # Пересечение по индексу question_tags (tag_id, question_id)
+        tagged = tags.tagged_with_all(db, QuestionTag, QuestionTag.question_id, requirements.split(","))
+        if tagged is None:
+            return None
+        query = query.filter(Question.id.in_(tagged))
+    return query
+
+
+@router.get("/questions", response_model=List[QuestionBase])
+def list_questions(
+    request: Request,
+    response: Response,
+    city_id: Optional[int] = None,
+    topic_id: Optional[int] = None,
+    status_filter: Optional[str] = None,
+    requirements: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    if wants_ndjson(request):
+        return ndjson_response(
+            lambda session: _questions_query(session, city_id, topic_id, status_filter, requirements),
+            QUESTION_LIST_KEYS,
+            QuestionBase,
+        )
+    query = _questions_query(db, city_id, topic_id, status_filter, requirements)
+    if query is None:
+        return []
+    questions, next_cursor = paginate(query, QUESTION_LIST_KEYS, clamp_limit(limit), cursor)
+    set_next_cursor(response, next_cursor)
+    return questions
 
 
 @router.get("/questions/{question_id}")
-def get_question(question_id: int, db: Session = Depends(get_db)):
-    question = db.query(Question).filter(Question.id == question_id).first()
+async def get_question(
+    question_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    answers = db.query(Answer).filter(Answer.question_id == question_id).all()
-    answer_ids = [answer.id for answer in answers]
-    reactions = []
-    if answer_ids:
-        reactions = (
-            db.query(Reaction)
-            .filter(Reaction.entity_type == EntityType.answer, Reaction.entity_id.in_(answer_ids))
-            .all()
+    limit = clamp_limit(limit)
+
+    # Ранжирование целиком в одном запросе: helped, затем сохранения,
+    # затем репутация автора (user_stats.helped_count), затем возраст
+    answer_reactions = (
+        select(
+            Reaction.entity_id.label("answer_id"),
+            func.sum(case((Reaction.reaction_type == ReactionType.helped, 1), else_=0)).label("helped"),
+            func.sum(case((Reaction.reaction_type == ReactionType.saved, 1), else_=0)).label("saves"),
         )
-    help_map = {reaction.entity_id for reaction in reactions if reaction.reaction_type == ReactionType.helped}
-    save_counts = {}
-    for reaction in reactions:
-        if reaction.reaction_type == ReactionType.saved:
-            save_counts[reaction.entity_id] = save_counts.get(reaction.entity_id, 0) + 1
-    contributor_helped_counts = {
-        answer.user_id: db.query(Reaction)
-        .join(Answer, Reaction.entity_id == Answer.id)
-        .filter(Reaction.reaction_type == ReactionType.helped, Answer.user_id == answer.user_id)
-        .count()
-        for answer in answers
-    }
-    answers_sorted = sorted(
-        answers,
-        key=lambda answer: (
-            0 if answer.id in help_map else 1,
-            -save_counts.get(answer.id, 0),
-            -contributor_helped_counts.get(answer.user_id, 0),
-            answer.created_at,
-        ),
+        .join(Answer, Answer.id == Reaction.entity_id)
+        .where(Reaction.entity_type == EntityType.answer, Answer.question_id == question_id)
+        .group_by(Reaction.entity_id)
+        .subquery()
+    )
+    helped_rank = case((func.coalesce(answer_reactions.c.helped, 0) > 0, 0), else_=1)
+    saves = func.coalesce(answer_reactions.c.saves, 0)
+    reputation = func.coalesce(UserStats.helped_count, 0)
+    keys = [
+        (helped_rank, False),
+        (saves, True),
+        (reputation, True),
+        (Answer.created_at, False),
+        (Answer.id, False),
+    ]
+
+    stmt = (
+        select(Answer, helped_rank, saves, reputation)
+        .outerjoin(answer_reactions, answer_reactions.c.answer_id == Answer.id)
+        .outerjoin(UserStats, UserStats.user_id == Answer.user_id)
+        .where(Answer.question_id == question_id)
     )
+    if cursor:
+        stmt = stmt.where(keyset_filter(keys, decode_cursor(cursor, int, int, int, datetime, int)))
+    rows = (await db.execute(stmt.order_by(*keyset_order(keys)).limit(limit))).all()
+
+    next_cursor = None
+    if len(rows) == limit:
+        answer, *sort_values = rows[-1]
+        next_cursor = encode_cursor(*sort_values, answer.created_at, answer.id)
     return {
         "question": QuestionBase.model_validate(question),
-        "answers": [AnswerBase.model_validate(answer) for answer in answers_sorted],
+        "answers": [AnswerBase.model_validate(row[0]) for row in rows],
+        "answer_count": question.answer_count,
+        "next_cursor": next_cursor,
     }
 
 
-@router.post("/answers", response_model=AnswerBase)
-def create_answer(
-    payload: AnswerCreate,
-    db: Session = Depends(get_db),
-    # current_user is removed to allow unauthenticated access
-):
+def _insert_answer(db: Session, payload: AnswerCreate, email: str) -> AnswerBase:
     # Resolve user
-    email = payload.email or "member@travel.dev"
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        user = User(email=email)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-        # Ensure profile exists
-        if not db.query(UserProfile).filter(UserProfile.user_id == user.id).first():
-            db.add(UserProfile(user_id=user.id, cities_of_experience=[]))
-            db.commit()
-
-    question = db.query(Question).filter(Question.id == payload.question_id).first()
-    if not question:
+    if email == accounts.DEFAULT_MEMBER_EMAIL:
+        user_id = accounts.default_member_id(db)
+    else:
+        user_id = accounts.ensure_user(db, email).id
+
+    now = datetime.utcnow()
+    # UPDATE статистики треда заодно проверяет, что вопрос существует
+    if not thread_stats.record_answer(db, payload.question_id, now):
         raise HTTPException(status_code=404, detail="Question not found")
     answer = Answer(
         question_id=payload.question_id,
-        user_id=user.id,
+        user_id=user_id,
         answer_text=payload.answer_text,
         context=payload.context or {},
         media_url=payload.media_url,
+        created_at=now,
     )
     db.add(answer)
+    db.flush()
+    # сериализуем до commit, чтобы не перечитывать строку после него
+    result = AnswerBase.model_validate(answer)
     db.commit()
-    db.refresh(answer)
-    logger.info("Answer created %s on question %s by %s", answer.id, question.id, user.email)
-    return answer
+    return result
+
+
+@router.post("/answers", response_model=AnswerBase)
+def create_answer(
+    payload: AnswerCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    # current_user is removed to allow unauthenticated access
+):
+    email = payload.email or accounts.DEFAULT_MEMBER_EMAIL
+    with rate_limit.counted_on_success(ANSWER_POLICY, rate_limit.client_ip(request)):
+        result = _insert_answer(db, payload, email)
+    logger.info("Answer created %s on question %s by %s", result.id, result.question_id, email)
+    metrics.answers_created.inc("api")
+    return result
 
 
 @router.post("/reactions")
 def create_reaction(
     payload: ReactionCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(limit_by_principal(REACTION_POLICY)),
 ):
+    answer_author_id = None
     if payload.reaction_type == ReactionType.helped.value:
         if payload.entity_type != EntityType.answer.value:
             raise HTTPException(status_code=400, detail="Helped only for answers")
@@ -357,20 +460,28 @@ def create_reaction(
         if not answer:
             raise HTTPException(status_code=404, detail="Answer not found")
         question = db.query(Question).filter(Question.id == answer.question_id).first()
-        if question.author_id != current_user.id:
+        if question.author_id != current_user.user_id:
             raise HTTPException(status_code=403, detail="Only question author can mark helped")
+        answer_author_id = answer.user_id
     if payload.reaction_type == ReactionType.saved.value:
         if payload.entity_type not in {EntityType.answer.value, EntityType.card.value}:
             raise HTTPException(status_code=400, detail="Save only for answers and cards")
+        if payload.entity_type == EntityType.answer.value:
+            answer_author_id = db.query(Answer.user_id).filter(Answer.id == payload.entity_id).scalar()
     reaction = Reaction(
-        user_id=current_user.id,
+        user_id=current_user.user_id,
         entity_type=EntityType(payload.entity_type),
         entity_id=payload.entity_id,
         reaction_type=ReactionType(payload.reaction_type),
     )
     db.add(reaction)
+    if reaction.entity_type == EntityType.question:
+        thread_stats.record_question_reaction(db, payload.entity_id)
+    if answer_author_id is not None:
+        user_stats.record_answer_reaction(db, answer_author_id, reaction.reaction_type)
     db.commit()
     logger.info("Reaction %s created on %s %s", payload.reaction_type, payload.entity_type, payload.entity_id)
+    metrics.reactions_created.inc("api")
     return {"status": "ok"}
 
 
@@ -378,10 +489,10 @@ def create_reaction(
 def create_report(
     payload: ReportCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     report = Report(
-        reporter_id=current_user.id,
+        reporter_id=current_user.user_id,
         entity_type=EntityType(payload.entity_type),
         entity_id=payload.entity_id,
         reason=payload.reason,
@@ -420,12 +531,12 @@ def _generate_card_from_question(question: Question, answers: List[Answer]) -> d
 def generate_summary(
     question_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     question = db.query(Question).filter(Question.id == question_id).first()
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    if question.author_id != current_user.id:
+    if question.author_id != current_user.user_id:
         raise HTTPException(status_code=403, detail="Only author can generate summary")
     answers = db.query(Answer).filter(Answer.question_id == question_id).limit(3).all()
     template = _generate_card_from_question(question, answers)
@@ -448,47 +559,130 @@ def generate_summary(
     db.refresh(card)
     for answer in answers:
         db.add(CardSource(card_id=card.id, answer_id=answer.id))
+    tags.set_card_tags(db, card.id, card.requirements)
+    user_stats.record_card_sources(db, answers)
     question.status = QuestionStatus.compiling
     db.commit()
+    card_index.upsert(card)
     logger.info("Card draft generated %s for question %s", card.id, question.id)
     return card
 
 
+def _parse_card_facets(budget_tier: Optional[str], requirements: Optional[str]):
+    tier = None
+    if budget_tier:
+        try:
+            tier = BudgetTier(budget_tier)
+        except ValueError:
+            logger.warning("Invalid budget_tier: %s", budget_tier)
+    req_list = tags.normalize_tags(requirements.split(",")) if requirements else []
+    return tier, req_list
+
+
+CARD_LIST_KEYS = [(Card.updated_at, True), (Card.id, True)]
+
+
+def _has_card_facets(city_id, topic_id, tier, req_list) -> bool:
+    return bool(city_id or topic_id or tier or req_list)
+
+
+def _cards_query(db: Session, city_id, topic_id, budget_tier, requirements, include_drafts):
+    """All matching cards, filtered in SQL; used for NDJSON streams, which read every match anyway."""
+    tier, req_list = _parse_card_facets(budget_tier, requirements)
+    query = db.query(Card)
+    if not include_drafts:
+        query = query.filter(Card.status == CardStatus.published)
+    if city_id:
+        query = query.filter(Card.city_id == city_id)
+    if topic_id:
+        query = query.filter(Card.topic_id == topic_id)
+    if tier:
+        query = query.filter(Card.budget_tier == tier)
+    if req_list:
+        tagged = tags.tagged_with_all(db, CardTag, CardTag.card_id, req_list)
+        if tagged is None:
+            return None
+        query = query.filter(Card.id.in_(tagged))
+    return query
+
+
+def _card_page_ids(db: Session, limit: int, cursor: Optional[str], **facets):
+    """Ids of one page of cards matching the facets, and the next cursor.
+
+    Фасеты пересекаются и сортируются в памяти (services.card_index), так что
+    из БД читаем только карточки самой страницы, а не все совпавшие.
+    """
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    keys = card_index.page(db, limit + 1, after, **facets)
+    next_cursor = encode_cursor(*keys[limit - 1]) if len(keys) > limit else None
+    return [card_id for _, card_id in keys[:limit]], next_cursor
+
+
+def _in_order(cards, card_ids: List[int]):
+    by_id = {card.id: card for card in cards}
+    return [by_id[card_id] for card_id in card_ids if card_id in by_id]
+
+
 @router.get("/cards", response_model=List[CardBase])
 def list_cards(
+    request: Request,
+    response: Response,
     city_id: Optional[int] = None,
     topic_id: Optional[int] = None,
     budget_tier: Optional[str] = None,
     requirements: Optional[str] = None,
     include_drafts: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    query = db.query(Card)
-    if not include_drafts:
-        query = query.filter(Card.status == CardStatus.published)
-    if city_id:
-        query = query.filter(Card.city_id == city_id)
-    if topic_id:
-        query = query.filter(Card.topic_id == topic_id)
-    if budget_tier:
-        try:
-            query = query.filter(Card.budget_tier == BudgetTier(budget_tier))
-        except ValueError:
-            logger.warning("Invalid budget_tier: %s", budget_tier)
-    if requirements:
-        req_list = [req.strip() for req in requirements.split(",") if req.strip()]
-        for req in req_list:
-            query = query.filter(Card.requirements.contains(req))
-    return query.order_by(Card.updated_at.desc()).all()
+    if wants_ndjson(request):
+        return ndjson_response(
+            lambda session: _cards_query(session, city_id, topic_id, budget_tier, requirements, include_drafts),
+            CARD_LIST_KEYS,
+            CardBase,
+        )
+    tier, req_list = _parse_card_facets(budget_tier, requirements)
+    if _has_card_facets(city_id, topic_id, tier, req_list):
+        card_ids, next_cursor = _card_page_ids(
+            db,
+            clamp_limit(limit),
+            cursor,
+            city_id=city_id,
+            topic_id=topic_id,
+            budget_tier=tier,
+            requirements=req_list,
+            include_drafts=include_drafts,
+        )
+        cards = _in_order(db.query(Card).filter(Card.id.in_(card_ids)).all(), card_ids) if card_ids else []
+    else:
+        query = db.query(Card)
+        if not include_drafts:
+            query = query.filter(Card.status == CardStatus.published)
+        cards, next_cursor = paginate(query, CARD_LIST_KEYS, clamp_limit(limit), cursor)
+    set_next_cursor(response, next_cursor)
+    return cards
 
 
 @router.get("/cards/{card_id}", response_model=CardBase)
-def get_card(card_id: int, db: Session = Depends(get_db)):
-    card = db.query(Card).filter(Card.id == card_id).first()
+async def get_card(
+    card_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    card = await db.get(Card, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     if card.status != CardStatus.published:
         raise HTTPException(status_code=403, detail="Card not published")
+    # каждая запись карточки двигает updated_at, так что он и есть валидатор
+    etag = version_etag("card", card.id, card.updated_at)
+    unchanged = not_modified(request, etag, CARD_CACHE_CONTROL)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CARD_CACHE_CONTROL
     return card
 
 
@@ -497,7 +691,7 @@ def update_card(
     card_id: int,
     payload: CardUpdate,
     db: Session = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
     card = db.query(Card).filter(Card.id == card_id).first()
     if not card:
@@ -508,97 +702,244 @@ def update_card(
     card.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(card)
+    card_index.upsert(card)
     logger.info("Card updated %s", card.id)
     return card
 
 
 @router.get("/search/cards", response_model=List[CardBase])
-def search_cards(
+async def search_cards(
+    request: Request,
+    response: Response,
     city_id: Optional[str] = None,
     topic_id: Optional[str] = None,
     budget_tier: Optional[str] = None,
     requirements: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Convert string IDs to integers only if they are numeric
     c_id = int(city_id) if city_id and city_id.isdigit() else None
     t_id = int(topic_id) if topic_id and topic_id.isdigit() else None
-    
-    return list_cards(
-        city_id=c_id,
-        topic_id=t_id,
-        budget_tier=budget_tier,
-        requirements=requirements,
-        include_drafts=False,
-        db=db
+
+    if wants_ndjson(request):
+        return ndjson_response(
+            lambda session: _cards_query(session, c_id, t_id, budget_tier, requirements, False),
+            CARD_LIST_KEYS,
+            CardBase,
+        )
+    tier, req_list = _parse_card_facets(budget_tier, requirements)
+    if _has_card_facets(c_id, t_id, tier, req_list):
+        # Индекс в памяти синхронный; обновление из БД идет через run_sync на async-соединении
+        card_ids, next_cursor = await db.run_sync(
+            lambda session: _card_page_ids(
+                session,
+                clamp_limit(limit),
+                cursor,
+                city_id=c_id,
+                topic_id=t_id,
+                budget_tier=tier,
+                requirements=req_list,
+            )
+        )
+        cards = []
+        if card_ids:
+            cards = _in_order((await db.scalars(select(Card).where(Card.id.in_(card_ids)))).all(), card_ids)
+    else:
+        stmt = select(Card).where(Card.status == CardStatus.published)
+        cards, next_cursor = await paginate_async(db, stmt, CARD_LIST_KEYS, clamp_limit(limit), cursor)
+    set_next_cursor(response, next_cursor)
+    return cards
+
+
+@router.get("/search/cards/facets")
+def search_card_facets(
+    city_id: Optional[str] = None,
+    topic_id: Optional[str] = None,
+    budget_tier: Optional[str] = None,
+    requirements: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    # Все счетчики за один проход по битовым множествам card_index, без запросов на каждый фасет
+    tier, req_list = _parse_card_facets(budget_tier, requirements)
+    return card_index.facet_counts(
+        db,
+        city_id=int(city_id) if city_id and city_id.isdigit() else None,
+        topic_id=int(topic_id) if topic_id and topic_id.isdigit() else None,
+        budget_tier=tier,
+        requirements=req_list,
+    )
+
+
+@router.get("/search")
+def search_content(
+    q: str,
+    city_id: Optional[int] = None,
+    topic_id: Optional[int] = None,
+    types: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q is required")
+    type_list = [t.strip() for t in types.split(",") if t.strip()] if types else list(search.SEARCH_TYPES)
+    if not type_list or any(t not in search.SEARCH_TYPES for t in type_list):
+        raise HTTPException(status_code=400, detail="Invalid types")
+    items, next_cursor = search.search(
+        db,
+        q.strip(),
+        city_id=city_id,
+        topic_id=topic_id,
+        types=type_list,
+        limit=clamp_limit(limit),
+        cursor=cursor,
     )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+PROFILE_QUESTION_KEYS = [(Question.created_at, True), (Question.id, True)]
+PROFILE_ANSWER_KEYS = [(Answer.created_at, True), (Answer.id, True)]
+
+
+def _saved_cards_page(db: Session, user_id: int, limit: int, cursor: Optional[str] = None):
+    query = (
+        db.query(Card, Reaction.id)
+        .join(Reaction, and_(Reaction.entity_type == EntityType.card, Reaction.entity_id == Card.id))
+        .filter(Reaction.user_id == user_id, Reaction.reaction_type == ReactionType.saved)
+    )
+    if cursor:
+        (reaction_id,) = decode_cursor(cursor, int)
+        query = query.filter(Reaction.id < reaction_id)
+    rows = query.order_by(Reaction.id.desc()).limit(limit).all()
+    next_cursor = encode_cursor(rows[-1][1]) if len(rows) == limit else None
+    return [CardBase.model_validate(card) for card, _ in rows], next_cursor
 
 
 @router.get("/profile/me")
 def get_profile(
+    limit: int = DEFAULT_PAGE_SIZE,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
-    helped_count = (
-        db.query(Reaction)
-        .join(Answer, Reaction.entity_id == Answer.id)
-        .filter(Reaction.reaction_type == ReactionType.helped, Answer.user_id == current_user.id)
-        .count()
-    )
-    cards_used = (
-        db.query(CardSource)
-        .join(Answer, CardSource.answer_id == Answer.id)
-        .filter(Answer.user_id == current_user.id)
-        .count()
+    # Первые страницы списков; дальше клиент идет по курсорам через /profile/me/<list>
+    limit = clamp_limit(limit)
+    row = (
+        db.query(UserProfile, UserStats)
+        .select_from(User)
+        .outerjoin(UserProfile, UserProfile.user_id == User.id)
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .filter(User.id == current_user.user_id)
+        .one_or_none()
     )
-    saves_count = (
-        db.query(Reaction)
-        .join(Answer, Reaction.entity_id == Answer.id)
-        .filter(Reaction.reaction_type == ReactionType.saved, Answer.user_id == current_user.id)
-        .count()
+    if row is None:
+        # принципал берется из claims токена, а пользователь мог быть удален
+        raise HTTPException(status_code=401, detail="User not found")
+    profile, stats = row
+    saved_cards, saved_cards_cursor = _saved_cards_page(db, current_user.user_id, limit)
+    questions, questions_cursor = paginate(
+        db.query(Question).filter(Question.author_id == current_user.user_id), PROFILE_QUESTION_KEYS, limit
     )
-    saved_cards = (
-        db.query(Reaction)
-        .filter(Reaction.reaction_type == ReactionType.saved, Reaction.entity_type == EntityType.card)
-        .all()
+    answers, answers_cursor = paginate(
+        db.query(Answer).filter(Answer.user_id == current_user.user_id), PROFILE_ANSWER_KEYS, limit
     )
-    questions = db.query(Question).filter(Question.author_id == current_user.id).all()
-    answers = db.query(Answer).filter(Answer.user_id == current_user.id).all()
     return {
         "profile": profile,
         "stats": {
-            "helped_answers": helped_count,
-            "cards_used": cards_used,
-            "answer_saves": saves_count,
+            "helped_answers": stats.helped_count if stats else 0,
+            "cards_used": stats.cards_used if stats else 0,
+            "answer_saves": stats.saves_count if stats else 0,
         },
         "saved_cards": saved_cards,
-        "questions": questions,
-        "answers": answers,
+        "questions": [QuestionBase.model_validate(question) for question in questions],
+        "answers": [AnswerBase.model_validate(answer) for answer in answers],
+        "next_cursors": {
+            "saved_cards": saved_cards_cursor,
+            "questions": questions_cursor,
+            "answers": answers_cursor,
+        },
     }
 
 
+@router.get("/profile/me/saved-cards")
+def get_profile_saved_cards(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    items, next_cursor = _saved_cards_page(db, current_user.user_id, clamp_limit(limit), cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/profile/me/questions")
+def get_profile_questions(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    questions, next_cursor = paginate(
+        db.query(Question).filter(Question.author_id == current_user.user_id),
+        PROFILE_QUESTION_KEYS,
+        clamp_limit(limit),
+        cursor,
+    )
+    return {"items": [QuestionBase.model_validate(question) for question in questions], "next_cursor": next_cursor}
+
+
+@router.get("/profile/me/answers")
+def get_profile_answers(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    answers, next_cursor = paginate(
+        db.query(Answer).filter(Answer.user_id == current_user.user_id),
+        PROFILE_ANSWER_KEYS,
+        clamp_limit(limit),
+        cursor,
+    )
+    return {"items": [AnswerBase.model_validate(answer) for answer in answers], "next_cursor": next_cursor}
+
+
 @router.put("/profile/me")
 def update_profile(
     payload: ProfileUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.user_id).first()
     if not profile:
-        profile = UserProfile(user_id=current_user.id, cities_of_experience=[])
+        profile = UserProfile(user_id=current_user.user_id, cities_of_experience=[])
         db.add(profile)
     update_data = payload.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(profile, key, value)
     db.commit()
-    logger.info("Profile updated %s", current_user.id)
+    logger.info("Profile updated %s", current_user.user_id)
     return {"status": "ok"}
 
 
-@router.get("/admin/reports")
-def list_reports(db: Session = Depends(get_db), _: User = Depends(get_admin_user)):
-    return db.query(Report).order_by(Report.created_at.desc()).all()
+REPORT_LIST_KEYS = [(Report.created_at, True), (Report.id, True)]
+
+
+@router.get("/admin/reports", response_model=List[ReportBase])
+def list_reports(
+    request: Request,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_admin_user),
+):
+    if wants_ndjson(request):
+        return ndjson_response(lambda session: session.query(Report), REPORT_LIST_KEYS, ReportBase)
+    reports, next_cursor = paginate(db.query(Report), REPORT_LIST_KEYS, clamp_limit(limit), cursor)
+    set_next_cursor(response, next_cursor)
+    return reports
 
 
 @router.put("/admin/reports/{report_id}")
@@ -606,7 +947,7 @@ def update_report(
     report_id: int,
     status_update: str,
     db: Session = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
     report = db.query(Report).filter(Report.id == report_id).first()
     if not report:
@@ -617,18 +958,118 @@ def update_report(
     return {"status": "ok"}
 
 
-@router.get("/admin/questions")
+@router.get("/admin/slow-queries")
+def admin_slow_queries(limit: int = 50, _: Principal = Depends(get_admin_user)):
+    """Последние медленные запросы этого воркера, новые сверху."""
+    return {
+        "threshold_ms": settings.slow_query_ms,
+        "explain_sample_rate": settings.slow_query_explain_sample_rate,
+        "entries": slow_query_log.entries(clamp_limit(limit)),
+    }
+
+
+@router.delete("/admin/slow-queries")
+def clear_slow_queries(_: Principal = Depends(get_admin_user)):
+    slow_query_log.clear()
+    return {"status": "ok"}
+
+
+@router.get("/admin/profiles")
+def admin_profiles(_: Principal = Depends(get_admin_user)):
+    """Профили запросов этого воркера (X-Profile: 1), новые сверху."""
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/admin/profiles/{profile_id}")
+def admin_profile(profile_id: str, format: str = "speedscope", _: Principal = Depends(get_admin_user)):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    if format == "summary":
+        return profile.summary()
+    if format != "speedscope":
+        raise HTTPException(status_code=400, detail="format must be speedscope, collapsed or summary")
+    # speedscope.app opens the downloaded file as is
+    return JSONResponse(
+        profile.speedscope(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.speedscope.json"'},
+    )
+
+
+@router.get("/admin/traces")
+def admin_traces(_: Principal = Depends(get_admin_user)):
+    """Трейсы сэмплированных запросов (TRACE_SAMPLE_RATE), новые сверху."""
+    return tracing.list_traces()
+
+
+@router.get("/admin/traces/{name}")
+def admin_trace(name: str, _: Principal = Depends(get_admin_user)):
+    path = tracing.trace_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    # chrome://tracing и ui.perfetto.dev открывают файл как есть
+    return FileResponse(path, media_type="application/json", filename=name)
+
+
+@router.get("/admin/questions", response_model=List[QuestionBase])
 def admin_questions(
+    request: Request,
+    response: Response,
     status_filter: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
-    return list_questions(None, None, status_filter, db)
+    return list_questions(request, response, status_filter=status_filter, limit=limit, cursor=cursor, db=db)
 
 
 @router.get("/admin/cards/drafts", response_model=List[CardBase])
 def admin_card_drafts(
+    request: Request,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
-    return db.query(Card).filter(Card.status == CardStatus.draft).all()
+    if wants_ndjson(request):
+        return ndjson_response(
+            lambda session: session.query(Card).filter(Card.status == CardStatus.draft),
+            CARD_LIST_KEYS,
+            CardBase,
+        )
+    drafts, next_cursor = paginate(
+        db.query(Card).filter(Card.status == CardStatus.draft), CARD_LIST_KEYS, clamp_limit(limit), cursor
+    )
+    set_next_cursor(response, next_cursor)
+    return drafts
+
+
+@router.post("/admin/import")
+async def admin_import(
+    request: Request,
+    chunk_size: int = Query(ingest.CHUNK_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_admin_user),
+):
+    """
+    Bulk import NDJSON: one question/answer/reaction per line, see app.services.ingest.
+    Тело читается потоком, в БД пишем чанками в тредпуле.
+    """
+    importer = ingest.Importer(db, chunk_size=chunk_size)
+    tail = b""
+    async for piece in request.stream():
+        *lines, tail = (tail + piece).split(b"\n")
+        if lines:
+            await run_in_threadpool(importer.add_lines, lines)
+    if tail:
+        await run_in_threadpool(importer.add_line, tail)
+    report = await run_in_threadpool(importer.finish)
+    logger.info("Bulk import: %s lines, inserted %s, %s errors", report.lines, dict(report.inserted), report.error_count)
+    metrics.questions_created.inc("import", amount=report.inserted["question"])
+    metrics.answers_created.inc("import", amount=report.inserted["answer"])
+    metrics.reactions_created.inc("import", amount=report.inserted["reaction"])
+    return report.as_dict()
@@ -0,0 +1,50 @@
+from typing import Callable, Optional, Type
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+
+from app.api.pagination import keyset_order
+from app.core.db import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_BATCH_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def ndjson_response(
+    build_query: Callable[[Session], Optional[Query]],
+    keys,
+    schema: Type[BaseModel],
+) -> StreamingResponse:
+    """Stream every row of a query, in keyset_order(keys), as NDJSON with flat memory.
+
+    The request session is closed before a streaming body is sent, so the
+    stream opens its own; `build_query` receives it and returns the filtered
+    query (or None for an empty result). Rows are fetched `STREAM_BATCH_SIZE`
+    at a time through yield_per, which uses a server-side cursor on Postgres.
+    """
+
+    def generate():
+        db = SessionLocal()
+        try:
+            query = build_query(db)
+            if query is None:
+                return
+            query = query.order_by(*keyset_order(keys)).yield_per(STREAM_BATCH_SIZE)
+            for row in query:
+                yield schema.model_validate(row).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
@@ -8,7 +8,47 @@ class Settings:
     secret_key: str = os.getenv("SECRET_KEY", "dev-secret-key")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080"))
     otp_expire_minutes: int = int(os.getenv("OTP_EXPIRE_MINUTES", "15"))
+    otp_purge_interval_seconds: float = float(os.getenv("OTP_PURGE_INTERVAL_SECONDS", "600"))
     environment: str = os.getenv("ENVIRONMENT", "development")
+    card_index_refresh_seconds: float = float(os.getenv("CARD_INDEX_REFRESH_SECONDS", "30"))
+    # Re-read window for writes committed after a newer one, and how often the index is rebuilt
+    card_index_watermark_lag_seconds: float = float(os.getenv("CARD_INDEX_WATERMARK_LAG_SECONDS", "60"))
+    card_index_full_reload_seconds: float = float(os.getenv("CARD_INDEX_FULL_RELOAD_SECONDS", "600"))
+    auth_cache_seconds: float = float(os.getenv("AUTH_CACHE_SECONDS", "60"))
+    auth_cache_size: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+    rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    rate_limit_redis_url: str = os.getenv("RATE_LIMIT_REDIS_URL", "")
+    reference_cache_seconds: int = int(os.getenv("REFERENCE_CACHE_SECONDS", "300"))
+    # Server-Timing header and one log line per request
+    request_timing_enabled: bool = os.getenv("REQUEST_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+    # SQL statements a request may run before a warning is logged; 0 disables.
+    # QUERY_BUDGETS overrides per route: "GET /feed=2,GET /questions/{question_id}=5"
+    query_budget_default: int = int(os.getenv("QUERY_BUDGET_DEFAULT", "20"))
+    query_budgets: str = os.getenv("QUERY_BUDGETS", "")
+    # Statements slower than this are kept (last N) and shown at /admin/slow-queries; 0 disables
+    slow_query_ms: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    slow_query_explain_sample_rate: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.2"))
+    slow_query_buffer_size: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "100"))
+    # Admin-only request profiling (X-Profile: 1 header or ?_profile=1)
+    profile_interval_ms: float = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+    profile_buffer_size: int = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+    # Fraction of requests written to TRACE_DIR as Chrome trace-event JSON (/admin/traces); 0 disables
+    trace_sample_rate: float = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    trace_dir: str = os.getenv("TRACE_DIR", "/tmp/travel_decision_traces")
+    trace_max_files: int = int(os.getenv("TRACE_MAX_FILES", "200"))
+    # Bearer token for /metrics and /metrics/db-pool; without one they are served only in development
+    metrics_token: str = os.getenv("METRICS_TOKEN", "")
+    # Shared directory for aggregating /metrics over uvicorn workers; empty = this worker only
+    metrics_dir: str = os.getenv("METRICS_DIR", "")
+    metrics_flush_seconds: float = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    # Connection pool, per engine and per worker process
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # PgBouncer in transaction mode: no app-side pool, no server-side prepared statements
+    db_pgbouncer: bool = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
 
     def __post_init__(self):
         # Fix deprecated postgres:// scheme for SQLAlchemy 2.0+
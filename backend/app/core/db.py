@@ -1,7 +1,17 @@
-from sqlalchemy import create_engine, event
+from typing import Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
+from app.core.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from app.core.query_stats import instrument_engine
+from app.core.slow_queries import slow_query_log
 
 connect_args = {}
 if settings.database_url.startswith("sqlite"):
@@ -10,7 +20,23 @@ elif settings.database_url.startswith("postgresql"):
     # Render PostgreSQL requires SSL
     connect_args = {"sslmode": "require"}
 
-engine = create_engine(settings.database_url, pool_pre_ping=True, connect_args=connect_args)
+
+
+def _pool_args(poolclass) -> dict:
+    if settings.db_pgbouncer:
+        # PgBouncer owns the pooling; holding connections here would pin server slots
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+engine = create_engine(settings.database_url, connect_args=connect_args, **_pool_args(TimedQueuePool))
 
 if settings.database_url.startswith("sqlite"):
     @event.listens_for(engine, "connect")
@@ -19,6 +45,73 @@ if settings.database_url.startswith("sqlite"):
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 
+instrument_engine(engine)
+slow_query_log.explain_engine = engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url_and_args(database_url: str):
+    # Async path: asyncpg for Postgres, aiosqlite for local mode.
+    # asyncpg doesn't understand libpq's sslmode, it takes `ssl` as a connect argument
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), {}
+    # TLS is required by default, like the sync engine's connect_args; an explicit sslmode in the URL wins
+    args = {"ssl": url.query.get("sslmode") or "require"}
+    url = url.difference_update_query(["sslmode"])
+    if settings.db_pgbouncer:
+        # Transaction pooling hands each transaction a different server connection,
+        # so prepared statements must be neither cached nor reused by name
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        args["statement_cache_size"] = 0
+        args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    return url.set(drivername="postgresql+asyncpg"), args
+
+
+async_url, async_connect_args = _async_url_and_args(settings.database_url)
+async_engine = create_async_engine(
+    async_url, connect_args=async_connect_args, **_pool_args(TimedAsyncAdaptedQueuePool)
+)
+
+if settings.database_url.startswith("sqlite"):
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_async_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
+
+
+def dialect_insert(db, model):
+    """INSERT construct with on_conflict_* support for the session's backend (Postgres or SQLite)."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+
+def insert_or_ignore(db, model, key: str, values: dict) -> Optional[int]:
+    """INSERT ... ON CONFLICT (key) DO NOTHING RETURNING id: the new id, or None if the key exists."""
+    stmt = dialect_insert(db, model).values(**values).on_conflict_do_nothing(index_elements=[getattr(model, key)])
+    return db.execute(stmt.returning(model.id)).scalar()
+
+
+def get_or_create_id(db, model, key: str, values: dict) -> Tuple[int, bool]:
+    """Id of the row whose unique `key` column equals values[key], inserting `values` if missing.
+
+    Existing rows cost one SELECT. Missing ones go through insert_or_ignore, so
+    a concurrent request inserting the same key can't fail this one; the loser
+    re-reads the winner's row. Returns (id, created); the caller commits.
+    """
+    lookup = select(model.id).where(getattr(model, key) == values[key])
+    existing = db.execute(lookup).scalar()
+    if existing is not None:
+        return existing, False
+    created = insert_or_ignore(db, model, key, values)
+    if created is not None:
+        return created, True
+    return db.execute(lookup).scalar_one(), False
@@ -0,0 +1,411 @@
+"""In-process metrics registry, exported as Prometheus text on /metrics.
+
+Counters, gauges and fixed-bucket histograms live in this process. With
+several uvicorn workers a scrape reaches only one of them, so when METRICS_DIR
+is set every worker writes a JSON snapshot of its registry to
+`METRICS_DIR/worker-<uuid>.json` every METRICS_FLUSH_SECONDS (and right
+before it answers a scrape), and /metrics renders the sum over all snapshots:
+
+- counters and histograms are summed over every worker, including workers
+  that have exited, so totals never go backwards when a worker is replaced.
+  Files are named per process rather than per pid, so a new worker reusing a
+  dead worker's pid can't overwrite (and reset) its totals. A worker counts
+  as alive when its pid exists and that process started when the snapshot
+  says it did, so a reused pid doesn't keep a dead worker's file alive.
+  Exited workers' files are folded into `archive.json` on the next scrape;
+- gauges are summed over live workers only (e.g. connections checked out
+  across the whole instance).
+
+The first worker of a new instance (a new uvicorn master) empties the
+directory, so counters from the previous deploy are not carried over.
+Changes to the directory's files happen under an flock on `METRICS_DIR/.lock`.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows (local runs): a single worker, nothing to lock against
+    fcntl = None
+
+logger = logging.getLogger("travel_decision")
+
+PREFIX = "travel_decision_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+LabelValues = Tuple[str, ...]
+
+WORKER_ID = uuid.uuid4().hex
+ARCHIVE_FILE = "archive.json"
+INSTANCE_FILE = "instance"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, object] = {}
+
+    def _key(self, labels: Iterable) -> LabelValues:
+        key = tuple(str(label) for label in labels)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        return key
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [[list(key), value] for key, value in self._values.items()]
+        return {"type": self.kind, "help": self.help, "labelnames": list(self.labelnames), "samples": samples}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, *labels) -> None:
+        # For totals kept elsewhere (pool checkout stats) and copied in at collection time
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self._values.items()]
+        return {
+            "type": self.kind,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "samples": samples,
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """`collect` runs before every snapshot, to copy in values that are read rather than counted."""
+        self._collectors.append(collect)
+
+    def snapshot(self) -> dict:
+        for collect in self._collectors:
+            collect()
+        return {
+            "pid": os.getpid(),
+            "started": _process_start(os.getpid()),
+            "worker": WORKER_ID,
+            "written_at": time.time(),
+            "metrics": {name: metric.snapshot() for name, metric in self._metrics.items()},
+        }
+
+
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_request_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements per HTTP request", ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections", "Pooled connections by state (checked_out, checked_in, overflow)", ("engine", "state")
+)
+db_pool_size = registry.gauge("db_pool_size", "Configured pool size", ("engine",))
+db_pool_checkouts = registry.counter("db_pool_checkouts_total", "Connection checkouts", ("engine",))
+db_pool_timeouts = registry.counter("db_pool_checkout_timeouts_total", "Checkouts that hit DB_POOL_TIMEOUT", ("engine",))
+db_pool_wait = registry.counter(
+    "db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", ("engine",)
+)
+cache_requests = registry.counter("cache_requests_total", "Cache lookups by result (hit, miss)", ("cache", "result"))
+questions_created = registry.counter("questions_created_total", "Questions created", ("source",))
+answers_created = registry.counter("answers_created_total", "Answers created", ("source",))
+reactions_created = registry.counter("reactions_created_total", "Reactions created", ("source",))
+
+
+def record_pool(engine_name: str, status: dict) -> None:
+    """Copy a core.pool.pool_status() result into the pool metrics."""
+    if "size" in status:
+        db_pool_size.set(status["size"], engine_name)
+        for state in ("checked_out", "checked_in", "overflow"):
+            db_pool_connections.set(status[state], engine_name, state)
+    if "checkouts" in status:
+        db_pool_checkouts.set_total(status["checkouts"], engine_name)
+        db_pool_timeouts.set_total(status["timeouts"], engine_name)
+        db_pool_wait.set_total(status["wait_seconds_total"], engine_name)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+# Aggregation across workers
+
+
+@contextmanager
+def _directory_lock(directory: str):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ".lock"), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """Start time of process `pid` in clock ticks since boot, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/stat") as handle:
+            # field 22, after the parenthesized command name (which may contain spaces)
+            return handle.read().rpartition(")")[2].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _instance_id() -> str:
+    """The uvicorn master this worker belongs to: its pid, and its start time so a reused pid differs."""
+    parent = os.getppid()
+    return f"{parent}:{_process_start(parent) or ''}"
+
+
+def claim_directory(directory: str) -> None:
+    """At worker startup: empty the directory if it was last used by another instance."""
+    os.makedirs(directory, exist_ok=True)
+    instance = _instance_id()
+    marker = os.path.join(directory, INSTANCE_FILE)
+    with _directory_lock(directory):
+        try:
+            with open(marker) as handle:
+                previous = handle.read()
+        except FileNotFoundError:
+            previous = None
+        if previous == instance:
+            return
+        for name in os.listdir(directory):
+            if name.endswith(".json") or name.endswith(".tmp"):
+                os.remove(os.path.join(directory, name))
+        with open(marker, "w") as handle:
+            handle.write(instance)
+    if previous is not None:
+        logger.info("Cleared metrics left in %s by a previous instance", directory)
+
+
+def _write_json(path: str, payload: dict) -> None:
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as handle:
+        json.dump(payload, handle)
+    os.replace(temporary, path)
+
+
+def write_snapshot(directory: str) -> None:
+    _write_json(os.path.join(directory, f"worker-{WORKER_ID}.json"), registry.snapshot())
+
+
+async def flush_periodically(directory: str, interval_seconds: float) -> None:
+    """Background loop for each worker when METRICS_DIR is set."""
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        try:
+            await asyncio.to_thread(write_snapshot, directory)
+        except Exception:
+            logger.exception("Writing the metrics snapshot failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def _alive(snapshot: dict) -> bool:
+    """Whether the process that wrote `snapshot` still runs; the archive (pid None) never does."""
+    pid = snapshot["pid"]
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # The pid may have been reused by a newer process (possibly this one) since the snapshot was written
+    return _process_start(pid) == snapshot.get("started")
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_snapshots(directory: str) -> List[dict]:
+    """The archive plus every worker snapshot; exited workers are folded into the archive first."""
+    with _directory_lock(directory):
+        archive = _read_json(os.path.join(directory, ARCHIVE_FILE)) or {"pid": None, "folded": [], "metrics": {}}
+        folded = set(archive["folded"])
+        snapshots, exited = [], []
+        for name in os.listdir(directory):
+            if not name.startswith("worker-") or not name.endswith(".json"):
+                continue
+            if name in folded:
+                # already in the archive; the unlink after the fold didn't happen
+                os.remove(os.path.join(directory, name))
+                continue
+            # None: half-written by a worker that died mid-write; its previous totals are gone either way
+            snapshot = _read_json(os.path.join(directory, name))
+            if snapshot is None:
+                continue
+            if _alive(snapshot):
+                snapshots.append(snapshot)
+            else:
+                exited.append((name, snapshot))
+        if exited:
+            archive = _fold(archive, exited)
+            _write_json(os.path.join(directory, ARCHIVE_FILE), archive)
+            for name, _ in exited:
+                os.remove(os.path.join(directory, name))
+    return [archive] + snapshots
+
+
+def _fold(archive: dict, exited: List[Tuple[str, dict]]) -> dict:
+    """Add exited workers' counters and histograms to the archive; their gauges are dropped."""
+    merged = merge([archive] + [snapshot for _, snapshot in exited])
+    return {
+        "pid": None,
+        # the names are kept until the next fold, so a crash between the write and the unlinks can't count twice
+        "folded": [name for name, _ in exited],
+        "metrics": {
+            name: {**metric, "samples": [[list(labels), value] for labels, value in metric["samples"].items()]}
+            for name, metric in merged.items()
+        },
+    }
+
+
+def merge(snapshots: List[dict]) -> Dict[str, dict]:
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        alive = _alive(snapshot)
+        for name, metric in snapshot["metrics"].items():
+            if metric["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if metric["type"] == "histogram":
+                    if current is None:
+                        current = target["samples"][key] = [[0] * len(metric["buckets"]), 0.0, 0]
+                    current[0] = [a + b for a, b in zip(current[0], value[0])]
+                    current[1] += value[1]
+                    current[2] += value[2]
+                else:
+                    target["samples"][key] = (current or 0.0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(merged: Dict[str, dict]) -> str:
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for labels, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(metric["buckets"], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(names, labels, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(names, labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def exposition() -> str:
+    """Prometheus text for this worker, or for all workers when METRICS_DIR is set."""
+    if not settings.metrics_dir:
+        return render(merge([registry.snapshot()]))
+    write_snapshot(settings.metrics_dir)
+    return render(merge(_read_snapshots(settings.metrics_dir)))
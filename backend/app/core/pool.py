@@ -0,0 +1,84 @@
+"""Connection pools that record how long checkouts wait.
+
+Size, overflow and in-use counts are read straight from the pool when metrics
+are requested; wait time is only observable around the checkout itself, so the
+pool classes below time `_do_get` and keep running totals per engine. For a
+traced request the checkout is also a "pool checkout" span: sessions connect
+lazily, so this is where a request actually waits for a connection.
+"""
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.tracing import trace_span
+
+
+class CheckoutWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.total_seconds, 6),
+                "wait_seconds_max": round(self.max_seconds, 6),
+                "wait_seconds_avg": round(self.total_seconds / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+
+
+class _TimedCheckout:
+    # Class-level so the stats survive pool.recreate() on engine.dispose()
+    wait_stats: CheckoutWaitStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            with trace_span("pool checkout", "db"):
+                connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.observe(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    wait_stats = CheckoutWaitStats()
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    wait_stats = CheckoutWaitStats()
+
+
+def pool_status(pool) -> dict:
+    """Current occupancy and checkout wait totals of an engine's pool."""
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    wait_stats: Optional[CheckoutWaitStats] = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.snapshot())
+    return status
@@ -0,0 +1,208 @@
+"""Sampling profiler for single requests, and the buffer their profiles are kept in.
+
+While a request is profiled, a background thread samples the Python stacks of
+the threads working on it every PROFILE_INTERVAL_MS:
+
+- the event loop thread, for the whole request (async routes, middleware,
+  serialization). Other requests' coroutines running on the loop at the same
+  time show up there too;
+- threadpool threads, while they run this request's sync endpoint or one of
+  its SQL statements (registered by TimedRoute and the cursor hooks).
+
+A thread inside cursor.execute gets an extra leaf frame naming the normalized
+statement, so SQL time is visible per statement in the flame graph; exact
+per-statement totals are recorded alongside.
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.slow_queries import normalize_sql
+
+MAX_STACK_DEPTH = 200
+SQL_LABEL_LENGTH = 160
+
+Stack = Tuple[str, ...]
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_ROOT):
+        filename = os.path.relpath(filename, _BACKEND_ROOT)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[-1]
+    else:
+        filename = os.path.basename(filename)
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, interval_seconds: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.created_at = datetime.utcnow()
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.duration_seconds = 0.0
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sql: Dict[str, List[float]] = {}
+        self._loop_thread = threading.get_ident()
+        self._attached: Counter = Counter()
+        self._active_sql: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_until_stopped, name=f"profiler-{self.id}", daemon=True)
+
+    # Called from the threads doing the request's work
+
+    def attach(self) -> None:
+        with self._lock:
+            self._attached[threading.get_ident()] += 1
+
+    def detach(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            self._attached[ident] -= 1
+            if self._attached[ident] <= 0:
+                del self._attached[ident]
+
+    def sql_started(self, statement: str) -> None:
+        self.attach()
+        self._active_sql[threading.get_ident()] = normalize_sql(statement)
+
+    def sql_finished(self, seconds: float) -> None:
+        sql = self._active_sql.pop(threading.get_ident(), None)
+        self.detach()
+        if sql is not None:
+            with self._lock:
+                self.sql.setdefault(sql, []).append(seconds)
+
+    # Sampling
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self.duration_seconds = time.perf_counter() - self._started_at
+        self._stopped.set()
+        self._sampler.join()
+
+    def _sample_until_stopped(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            with self._lock:
+                threads = {self._loop_thread, *self._attached}
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[self._stack(frame, ident)] += 1
+            self.samples += 1
+
+    def _stack(self, frame, ident: int) -> Stack:
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            names.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        names.reverse()
+        sql = self._active_sql.get(ident)
+        if sql is not None:
+            names.append("SQL: " + sql[:SQL_LABEL_LENGTH].replace(";", ","))
+        thread = "event loop" if ident == self._loop_thread else "worker thread"
+        return (thread, *names)
+
+    # Output
+
+    def summary(self) -> dict:
+        statements = sorted(self.sql.items(), key=lambda item: -sum(item[1]))
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "duration_ms": round(self.duration_seconds * 1000, 2),
+            "interval_ms": self.interval_seconds * 1000,
+            "samples": self.samples,
+            "sql": {
+                "queries": sum(len(durations) for durations in self.sql.values()),
+                "db_ms": round(sum(sum(durations) for durations in self.sql.values()) * 1000, 2),
+                "statements": [
+                    {"sql": sql, "count": len(durations), "total_ms": round(sum(durations) * 1000, 2)}
+                    for sql, durations in statements
+                ],
+            },
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stacks: one `frame;frame;frame count` line per stack."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self) -> dict:
+        frames: List[dict] = []
+        index: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            sample = []
+            for name in stack:
+                if name not in index:
+                    index[name] = len(frames)
+                    frames.append({"name": name})
+                sample.append(index[name])
+            samples.append(sample)
+            weights.append(round(count * self.interval_seconds * 1000, 3))
+        name = f"{self.method} {self.path}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "travel_decision",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class ProfileStore:
+    """The last PROFILE_BUFFER_SIZE profiles of this worker."""
+
+    def __init__(self, size: int):
+        self._profiles: "deque[RequestProfile]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def list(self) -> List[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+
+profile_store = ProfileStore(settings.profile_buffer_size)
@@ -0,0 +1,78 @@
+"""Per-request SQL statement counts and database time.
+
+The request middleware puts a RequestStats into a context variable; cursor
+execute hooks on both engines add to whichever RequestStats is current.
+Context variables follow the request into the threadpool (sync routes and
+dependencies) and into SQLAlchemy's async greenlets, so statements are
+attributed to the right request even with many in flight. Statements run
+outside a request (startup, background tasks, scripts) are not counted.
+
+Statements over SLOW_QUERY_MS, inside a request or not, also go to
+app.core.slow_queries; in traced requests each statement is a span of the
+trace (app.core.tracing).
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.slow_queries import normalize_sql, slow_query_log
+
+if TYPE_CHECKING:
+    from app.core.profiler import RequestProfile
+    from app.core.tracing import RequestTrace
+
+
+@dataclass
+class RequestStats:
+    route: Optional[str] = None
+    queries: int = 0
+    db_seconds: float = 0.0
+    handler_seconds: float = 0.0
+    handler_finished_at: Optional[float] = None
+    # Set only for requests an admin asked to profile
+    profile: Optional["RequestProfile"] = None
+    # Set only for requests sampled by TRACE_SAMPLE_RATE
+    trace: Optional["RequestTrace"] = None
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    if stats is not None and stats.profile is not None:
+        stats.profile.sql_started(statement)
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    elapsed = time.perf_counter() - started
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.profile is not None:
+            stats.profile.sql_finished(elapsed)
+        if stats.trace is not None:
+            args = {"sql": normalize_sql(statement)} if statement is not None else {"error": True}
+            stats.trace.complete("SQL", "sql", started, elapsed, args)
+    if statement is not None and slow_query_log.is_slow(elapsed):
+        slow_query_log.record(conn, statement, parameters, executemany, elapsed, stats.route if stats else None)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; it still counts, with its time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started_at") and exception_context.cursor is not None:
+        _after_cursor_execute(conn, None, None, None, None, False)
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -1,4 +1,6 @@
 from datetime import datetime, timedelta
+from typing import Optional
+
 from jose import jwt
 from passlib.context import CryptContext
 
@@ -9,12 +11,19 @@ ALGORITHM = "HS256"
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, user_id: Optional[int] = None, is_admin: bool = False) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     payload = {"sub": subject, "exp": expire}
+    if user_id is not None:
+        payload["user_id"] = user_id
+        payload["is_admin"] = is_admin
     return jwt.encode(payload, settings.secret_key, algorithm=ALGORITHM)
 
 
+def decode_access_token(token: str) -> dict:
+    """Verified claims of a token; raises JWTError if it is invalid or expired."""
+    return jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
+
+
 def verify_access_token(token: str) -> str:
-    payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
-    return payload.get("sub")
+    return decode_access_token(token).get("sub")
@@ -0,0 +1,177 @@
+"""Recorder for statements slower than SLOW_QUERY_MS, with their query plans.
+
+Each slow statement is kept in a ring buffer of the last SLOW_QUERY_BUFFER_SIZE
+entries. An entry has the normalized SQL (literals and placeholders replaced
+by `?`, IN lists collapsed), the type of each bind parameter (values are never
+kept), the route that ran it and its duration. A sample of entries
+(SLOW_QUERY_EXPLAIN_SAMPLE_RATE) also get a query plan, captured on a
+background thread so the slow request isn't made slower:
+
+- Postgres: EXPLAIN (ANALYZE, BUFFERS) for SELECTs, run inside a rolled-back
+  transaction with a statement timeout; plain EXPLAIN for writes, which must
+  not be executed twice;
+- SQLite: EXPLAIN QUERY PLAN.
+
+Plans run on the sync engine. Statements from the async engine are converted
+from asyncpg's $n placeholders to positional %s first; aiosqlite and sqlite3
+share the same placeholder style.
+"""
+import logging
+import queue
+import random
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("travel_decision")
+
+EXPLAIN_QUEUE_SIZE = 100
+EXPLAIN_TIMEOUT_MS = 5000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_ASYNCPG_PLACEHOLDER = re.compile(r"\$(\d+)")
+
+
+def normalize_sql(statement: str) -> str:
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _type_name(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (str, bytes, list, tuple, dict)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shapes(parameters, executemany: bool):
+    """Types (and lengths) of the bind parameters, without their values."""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "first": parameter_shapes(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _type_name(value) for key, value in parameters.items()}
+    return [_type_name(value) for value in parameters or ()]
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, sample_rate: float, size: int):
+        self.threshold_seconds = threshold_ms / 1000 if threshold_ms > 0 else None
+        self.sample_rate = sample_rate
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+        self._worker: Optional[threading.Thread] = None
+        self.explain_engine = None
+
+    def is_slow(self, seconds: float) -> bool:
+        return self.threshold_seconds is not None and seconds >= self.threshold_seconds
+
+    def record(self, conn, statement: str, parameters, executemany: bool, seconds: float, route: Optional[str]):
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            # our own plan capture
+            return
+        entry = {
+            "recorded_at": datetime.utcnow().isoformat(),
+            "duration_ms": round(seconds * 1000, 2),
+            "route": route,
+            "engine": "async" if conn.dialect.is_async else "sync",
+            "sql": normalize_sql(statement),
+            "parameters": parameter_shapes(parameters, executemany),
+            "plan": None,
+            "plan_status": "not sampled",
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning("Slow query (%.0f ms) on %s: %s", seconds * 1000, route or "no request", entry["sql"][:200])
+        if self.explain_engine is None or random.random() >= self.sample_rate:
+            return
+        if executemany:
+            parameters = list(parameters)[0] if parameters else ()
+        if conn.dialect.is_async and conn.dialect.name == "postgresql":
+            statement, parameters = _to_positional(statement, parameters)
+        try:
+            self._queue.put_nowait((entry, statement, parameters))
+        except queue.Full:
+            entry["plan_status"] = "skipped: explain queue full"
+            return
+        entry["plan_status"] = "pending"
+        self._ensure_worker()
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            newest_first = list(reversed(self._entries))
+        return newest_first[:limit] if limit else newest_first
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._explain_forever, name="slow-query-explain", daemon=True)
+                self._worker.start()
+
+    def _explain_forever(self) -> None:
+        while True:
+            entry, statement, parameters = self._queue.get()
+            try:
+                entry["plan"] = explain(self.explain_engine, statement, parameters)
+                entry["plan_status"] = "done"
+            except Exception as exc:
+                entry["plan_status"] = f"failed: {exc}"[:500]
+
+
+def _to_positional(statement: str, parameters):
+    ordered = []
+
+    def substitute(match):
+        ordered.append(parameters[int(match.group(1)) - 1])
+        return "%s"
+
+    return _ASYNCPG_PLACEHOLDER.sub(substitute, statement.replace("%", "%%")), tuple(ordered)
+
+
+def explain(engine, statement: str, parameters) -> List[str]:
+    """Plan of `statement` as text lines; SELECTs on Postgres are actually executed (and rolled back)."""
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            if statement.lstrip()[:6].upper() == "SELECT":
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+            else:
+                prefix = "EXPLAIN "
+            rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+            conn.rollback()
+            return [row[0] for row in rows]
+        # SQLite: (id, parent, notused, detail), children indented under their parent
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        conn.rollback()
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_ms,
+    sample_rate=settings.slow_query_explain_sample_rate,
+    size=settings.slow_query_buffer_size,
+)
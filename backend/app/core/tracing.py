@@ -0,0 +1,148 @@
+"""Chrome trace-event export of request phases.
+
+A TRACE_SAMPLE_RATE fraction of requests is traced: RequestTimingMiddleware
+attaches a RequestTrace to the request's RequestStats, and spans are added as
+complete ("X") events by
+
+- the middleware: the whole request, and serialization (from the endpoint
+  returning until the response starts);
+- TimedRoute: the endpoint function, and validation and serialization of
+  its response_model;
+- the cursor hooks: every SQL statement, with its normalized text;
+- the pool: waiting for a connection on the first statement (app.core.pool);
+- `trace_span` blocks: dependencies (get_current_principal, session close,
+  ...).
+
+Events carry the real thread id, so the event loop and threadpool threads
+show up as separate tracks. Finished traces are written to TRACE_DIR as
+`<timestamp>-<method>-<route>-<id>.json`, the newest TRACE_MAX_FILES kept,
+and open directly in chrome://tracing or https://ui.perfetto.dev.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.query_stats import current_request_stats
+
+TRACE_FILE_PATTERN = re.compile(r"^[\w.-]+\.json$")
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.-]+")
+
+
+class RequestTrace:
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._loop_thread = threading.get_ident()
+        self._events: List[dict] = []
+        # thread id -> track label, in order of first appearance
+        self._threads: Dict[int, str] = {self._loop_thread: "event loop"}
+        self._lock = threading.Lock()
+
+    def complete(self, name: str, category: str, started: float, seconds: float, args: Optional[dict] = None):
+        """Add a span that started at perf_counter() value `started` and lasted `seconds`."""
+        ident = threading.get_ident()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self.origin) * 1e6, 3),
+            "dur": round(seconds * 1e6, 3),
+            "pid": self._pid,
+            "tid": ident,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+            if ident not in self._threads:
+                self._threads[ident] = f"threadpool {len(self._threads) - 1}"
+
+    def chrome_trace(self) -> dict:
+        with self._lock:
+            events = sorted(self._events, key=lambda event: event["ts"])
+            threads = dict(self._threads)
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": f"worker {self._pid}"}}
+        ]
+        for ident, label in threads.items():
+            metadata.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": ident, "args": {"name": label}})
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"id": self.id, "method": self.method, "path": self.path, "started_at": self.started_at.isoformat()},
+        }
+
+
+def _current_trace() -> Optional[RequestTrace]:
+    stats = current_request_stats.get()
+    return stats.trace if stats is not None else None
+
+
+@contextmanager
+def trace_span(name: str, category: str = "app", **args):
+    """Time the block as a span of the current request's trace; a no-op for untraced requests."""
+    trace = _current_trace()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.complete(name, category, started, time.perf_counter() - started, args or None)
+
+
+def should_trace() -> bool:
+    return random.random() < settings.trace_sample_rate
+
+
+def write_trace(trace: RequestTrace, route: str) -> str:
+    os.makedirs(settings.trace_dir, exist_ok=True)
+    stamp = trace.started_at.strftime("%Y%m%dT%H%M%S%f")
+    name = _UNSAFE_FILENAME_CHARS.sub("_", f"{stamp}-{route}-{trace.id}").strip("_") + ".json"
+    path = os.path.join(settings.trace_dir, name)
+    with open(path, "w") as handle:
+        json.dump(trace.chrome_trace(), handle)
+    _prune(settings.trace_dir, settings.trace_max_files)
+    return name
+
+
+def _prune(directory: str, keep: int) -> None:
+    # File names start with a sortable timestamp
+    names = sorted(name for name in os.listdir(directory) if TRACE_FILE_PATTERN.match(name))
+    for name in names[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def list_traces() -> List[dict]:
+    if not os.path.isdir(settings.trace_dir):
+        return []
+    traces = []
+    for name in sorted(os.listdir(settings.trace_dir), reverse=True):
+        if TRACE_FILE_PATTERN.match(name):
+            stat = os.stat(os.path.join(settings.trace_dir, name))
+            traces.append({"name": name, "bytes": stat.st_size})
+    return traces
+
+
+def trace_path(name: str) -> Optional[str]:
+    """Path of a trace file by name, or None; names are matched strictly so nothing outside TRACE_DIR is served."""
+    if not TRACE_FILE_PATTERN.match(name) or name.startswith("."):
+        return None
+    path = os.path.join(settings.trace_dir, name)
+    return path if os.path.isfile(path) else None
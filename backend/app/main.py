@@ -1,13 +1,53 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.deps import verify_metrics_access
+from app.api.instrumentation import RequestTimingMiddleware, TimedRoute
+from app.api.profiling import RequestProfilerMiddleware
 from app.api.routes import router
+from app.api.streaming import NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core import metrics
+from app.core.db import async_engine, engine
+from app.core.pool import pool_status
+from app.services.otp import purge_periodically
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
-app = FastAPI(title="Travel Decision Platform API")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if settings.otp_purge_interval_seconds > 0:
+        tasks.append(asyncio.create_task(purge_periodically(settings.otp_purge_interval_seconds)))
+    if settings.metrics_dir:
+        metrics.claim_directory(settings.metrics_dir)
+        tasks.append(asyncio.create_task(metrics.flush_periodically(settings.metrics_dir, settings.metrics_flush_seconds)))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if settings.metrics_dir:
+        metrics.write_snapshot(settings.metrics_dir)
+
+
+def _collect_pool_metrics():
+    metrics.record_pool("sync", pool_status(engine.pool))
+    metrics.record_pool("async", pool_status(async_engine.sync_engine.pool))
+
+
+metrics.registry.add_collector(_collect_pool_metrics)
+
+
+app = FastAPI(title="Travel Decision Platform API", lifespan=lifespan)
+app.router.route_class = TimedRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,7 +55,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(RequestProfilerMiddleware)
+# Outermost, so its total covers CORS and everything below it
+app.add_middleware(RequestTimingMiddleware)
 
 app.include_router(router)
 
@@ -32,3 +76,17 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics/db-pool", dependencies=[Depends(verify_metrics_access)])
+def db_pool_metrics():
+    # Per worker process: multiply by the worker count when sizing against max_connections
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.sync_engine.pool),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verify_metrics_access)])
+def prometheus_metrics():
+    return PlainTextResponse(metrics.exposition(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -5,10 +5,12 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     JSON,
+    event,
 )
 from sqlalchemy.orm import relationship
 
@@ -21,6 +23,7 @@ else:
     JSONB = JSON
 
 from app.core.db import Base
+from app.models.search import install_search_schema
 from app.models.enums import (
     BudgetTier,
     CardStatus,
@@ -65,6 +68,17 @@ class UserProfile(Base):
     user = relationship("User", back_populates="profile")
 
 
+class UserStats(Base):
+    """Contributor reputation counters, maintained by app.services.user_stats."""
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    helped_count = Column(Integer, default=0, server_default="0", nullable=False)
+    saves_count = Column(Integer, default=0, server_default="0", nullable=False)
+    cards_used = Column(Integer, default=0, server_default="0", nullable=False)
+
+
 class City(Base):
     __tablename__ = "cities"
 
@@ -82,6 +96,15 @@ class Topic(Base):
     name = Column(String(120), unique=True, nullable=False)
 
 
+class Tag(Base):
+    """Normalized requirement tag; see app.services.tags for the naming rules."""
+
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(80), unique=True, nullable=False)
+
+
 class Question(Base):
     __tablename__ = "questions"
 
@@ -101,12 +124,23 @@ class Question(Base):
         default=QuestionStatus.open,
     )
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Denormalized thread stats, kept up to date by app.services.thread_stats.
+    # last_activity_at is the feed sort key: latest answer time, or created_at
+    last_activity_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_message_at = Column(DateTime)
+    answer_count = Column(Integer, default=0, server_default="0", nullable=False)
+    vote_score = Column(Integer, default=0, server_default="0", nullable=False)
 
     author = relationship("User", back_populates="questions")
     answers = relationship("Answer", back_populates="question")
     city = relationship("City")
     topic = relationship("Topic")
 
+    __table_args__ = (
+        Index("ix_questions_last_activity_at_id", "last_activity_at", "id"),
+        Index("ix_questions_author_id_created_at", "author_id", "created_at"),
+    )
+
 
 class Answer(Base):
     __tablename__ = "answers"
@@ -122,6 +156,11 @@ class Answer(Base):
     question = relationship("Question", back_populates="answers")
     author = relationship("User", back_populates="answers")
 
+    __table_args__ = (
+        Index("ix_answers_question_id_created_at", "question_id", "created_at"),
+        Index("ix_answers_user_id_created_at", "user_id", "created_at"),
+    )
+
 
 class Reaction(Base):
     __tablename__ = "reactions"
@@ -141,6 +180,11 @@ class Reaction(Base):
 
     user = relationship("User", back_populates="reactions")
 
+    __table_args__ = (
+        Index("ix_reactions_entity", "entity_type", "entity_id", "reaction_type"),
+        Index("ix_reactions_user_id_reaction_type", "user_id", "reaction_type", "entity_type"),
+    )
+
 
 class Report(Base):
     __tablename__ = "reports"
@@ -187,6 +231,32 @@ class Card(Base):
     city = relationship("City", back_populates="cards")
     sources = relationship("CardSource", back_populates="card")
 
+    __table_args__ = (
+        Index("ix_cards_updated_at", "updated_at"),
+    )
+
+
+class QuestionTag(Base):
+    __tablename__ = "question_tags"
+
+    question_id = Column(Integer, ForeignKey("questions.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_question_tags_tag_id_question_id", "tag_id", "question_id"),
+    )
+
+
+class CardTag(Base):
+    __tablename__ = "card_tags"
+
+    card_id = Column(Integer, ForeignKey("cards.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_card_tags_tag_id_card_id", "tag_id", "card_id"),
+    )
+
 
 class CardSource(Base):
     __tablename__ = "card_sources"
@@ -206,4 +276,13 @@ class OtpCode(Base):
     email = Column(String(255), nullable=False)
     code = Column(String(6), nullable=False)
     expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_otp_codes_email_code_created_at", "email", "code", "created_at"),
+        Index("ix_otp_codes_expires_at", "expires_at"),
+    )
+
+
+event.listen(Base.metadata, "after_create", install_search_schema)
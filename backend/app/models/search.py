@@ -0,0 +1,124 @@
+"""Full-text search schema that lives outside the ORM models.
+
+Postgres keeps a generated tsvector column with a GIN index on each searchable
+table. Those come from migration f6a0d3c19b57 only: adding a stored generated
+column rewrites the table under an ACCESS EXCLUSIVE lock, which must not
+happen on every boot (seed.py runs create_all). SQLite (local mode) keeps one
+FTS5 shadow table, `search_index`, filled by triggers; its rowid encodes the
+entity as id * 4 + kind so triggers can update a row without scanning.
+"""
+from sqlalchemy import text
+
+_SQLITE_CARD_BODY = (
+    "coalesce(new.summary, '') || ' ' || "
+    "coalesce((SELECT group_concat(value, ' ') FROM json_each(new.recommendations)), '')"
+)
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body,
+        entity_type UNINDEXED, question_id UNINDEXED, city_id UNINDEXED, topic_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_ai AFTER INSERT ON questions BEGIN
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        VALUES (new.id * 4 + 1, '', new.question_text, 'question', new.id, new.city_id, new.topic_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_au
+    AFTER UPDATE OF question_text, city_id, topic_id ON questions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        VALUES (new.id * 4 + 1, '', new.question_text, 'question', new.id, new.city_id, new.topic_id);
+        UPDATE search_index SET city_id = new.city_id, topic_id = new.topic_id
+        WHERE rowid IN (SELECT id * 4 + 2 FROM answers WHERE question_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_ad AFTER DELETE ON questions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_answers_ai AFTER INSERT ON answers BEGIN
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        SELECT new.id * 4 + 2, '', new.answer_text, 'answer', new.question_id, questions.city_id, questions.topic_id
+        FROM questions WHERE questions.id = new.question_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_answers_au AFTER UPDATE OF answer_text ON answers BEGIN
+        UPDATE search_index SET body = new.answer_text WHERE rowid = new.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_answers_ad AFTER DELETE ON answers BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_cards_ai AFTER INSERT ON cards
+    WHEN new.status = 'PUBLISHED' BEGIN
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        VALUES (new.id * 4 + 3, new.title, {_SQLITE_CARD_BODY}, 'card', NULL, new.city_id, new.topic_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_cards_au AFTER UPDATE ON cards BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+        INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+        SELECT new.id * 4 + 3, new.title, {_SQLITE_CARD_BODY}, 'card', NULL, new.city_id, new.topic_id
+        WHERE new.status = 'PUBLISHED';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_cards_ad AFTER DELETE ON cards BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+    END
+    """,
+]
+
+SQLITE_SEARCH_REBUILD = [
+    "DELETE FROM search_index",
+    """
+    INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+    SELECT id * 4 + 1, '', question_text, 'question', id, city_id, topic_id FROM questions
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+    SELECT answers.id * 4 + 2, '', answers.answer_text, 'answer', answers.question_id,
+        questions.city_id, questions.topic_id
+    FROM answers JOIN questions ON questions.id = answers.question_id
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body, entity_type, question_id, city_id, topic_id)
+    SELECT id * 4 + 3, title,
+        coalesce(summary, '') || ' ' ||
+        coalesce((SELECT group_concat(value, ' ') FROM json_each(cards.recommendations)), ''),
+        'card', NULL, city_id, topic_id
+    FROM cards WHERE status = 'PUBLISHED'
+    """,
+]
+
+
+def install_search_schema(target, connection, **kw) -> None:
+    """metadata after_create hook: add the SQLite search table and triggers create_all doesn't know about.
+
+    Idempotent and cheap, so it may run on every create_all; Postgres is left to the migration.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SQLITE_SEARCH_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_search_index(connection) -> None:
+    """Refill the SQLite FTS table from scratch; Postgres columns are generated and need nothing."""
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SQLITE_SEARCH_REBUILD:
+        connection.execute(text(statement))
@@ -79,3 +79,15 @@ class CardBase(BaseModel):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ReportBase(BaseModel):
+    id: int
+    reporter_id: int
+    entity_type: str
+    entity_id: int
+    reason: str
+    status: Optional[str]
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional, Union
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -54,3 +55,46 @@ class ProfileUpdate(BaseModel):
     travel_style: Optional[str] = None
     budget_tier: Optional[str] = None
     cities_of_experience: Optional[List[str]] = None
+
+
+# Bulk import (NDJSON, one record per line). `ref` is an id from the source
+# export; later records of the same import can point at it via question_ref /
+# entity_ref instead of a database id.
+class ImportQuestion(BaseModel):
+    type: Literal["question"]
+    ref: Optional[str] = None
+    email: Optional[EmailStr] = None
+    city: Optional[str] = None
+    city_id: Optional[int] = None
+    topic: Optional[str] = None
+    topic_id: Optional[int] = None
+    duration: str = Field(default="unknown", max_length=50)
+    budget_tier: Literal["low", "mid", "high"] = "mid"
+    requirements: List[str] = []
+    question_text: str = Field(min_length=1)
+    created_at: Optional[datetime] = None
+
+
+class ImportAnswer(BaseModel):
+    type: Literal["answer"]
+    ref: Optional[str] = None
+    question_id: Optional[int] = None
+    question_ref: Optional[str] = None
+    email: Optional[EmailStr] = None
+    answer_text: str = Field(min_length=1)
+    context: Optional[dict] = None
+    media_url: Optional[str] = Field(default=None, max_length=255)
+    created_at: Optional[datetime] = None
+
+
+class ImportReaction(BaseModel):
+    type: Literal["reaction"]
+    email: Optional[EmailStr] = None
+    entity_type: Literal["question", "answer", "card"]
+    entity_id: Optional[int] = None
+    entity_ref: Optional[str] = None
+    reaction_type: Literal["save", "helped", "thanks"]
+    created_at: Optional[datetime] = None
+
+
+ImportRecord = Annotated[Union[ImportQuestion, ImportAnswer, ImportReaction], Field(discriminator="type")]
@@ -0,0 +1,86 @@
+"""Users and the fallback rows that anonymous MVP write paths attach to.
+
+Anonymous threads and answers belong to the shared member account and, for
+threads, the first city and topic. Their ids are cached per process once they
+are known to be committed, so those endpoints skip the lookups entirely.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.db import get_or_create_id, insert_or_ignore
+from app.models.models import City, Topic, User, UserProfile
+
+DEFAULT_MEMBER_EMAIL = "member@travel.dev"
+DEFAULT_CITY = {"name": "Tashkent", "country": "Uzbekistan"}
+DEFAULT_TOPIC = {"name": "Remote work"}
+
+_default_ids: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class UserRef:
+    id: int
+    email: str
+    is_admin: bool
+
+
+def ensure_user(db: Session, email: str) -> UserRef:
+    """The user with this email, created together with an empty profile if missing; the caller commits."""
+    lookup = select(User.id, User.is_admin).where(User.email == email)
+    row = db.execute(lookup).first()
+    if row is not None:
+        return UserRef(row.id, email, row.is_admin)
+    user_id = insert_or_ignore(db, User, "email", {"email": email, "is_admin": False})
+    if user_id is None:
+        # a concurrent request created it between our SELECT and INSERT
+        row = db.execute(lookup).one()
+        return UserRef(row.id, email, row.is_admin)
+    insert_or_ignore(db, UserProfile, "user_id", {"user_id": user_id, "cities_of_experience": []})
+    return UserRef(user_id, email, False)
+
+
+def _cached(name: str, resolve) -> int:
+    cached = _default_ids.get(name)
+    if cached is not None:
+        return cached
+    value, created = resolve()
+    # A row created in this transaction might still roll back; cache it from the next request on
+    if not created:
+        with _lock:
+            _default_ids[name] = value
+    return value
+
+
+def default_member_id(db: Session) -> int:
+    def resolve():
+        existing = db.execute(select(User.id).where(User.email == DEFAULT_MEMBER_EMAIL)).scalar()
+        if existing is not None:
+            return existing, False
+        return ensure_user(db, DEFAULT_MEMBER_EMAIL).id, True
+
+    return _cached("member", resolve)
+
+
+def default_city_id(db: Session) -> int:
+    def resolve():
+        existing = db.execute(select(City.id).order_by(City.id).limit(1)).scalar()
+        if existing is not None:
+            return existing, False
+        return get_or_create_id(db, City, "name", DEFAULT_CITY)
+
+    return _cached("city", resolve)
+
+
+def default_topic_id(db: Session) -> int:
+    def resolve():
+        existing = db.execute(select(Topic.id).order_by(Topic.id).limit(1)).scalar()
+        if existing is not None:
+            return existing, False
+        return get_or_create_id(db, Topic, "name", DEFAULT_TOPIC)
+
+    return _cached("topic", resolve)
@@ -0,0 +1,239 @@
+"""In-process facet index over cards.
+
+Every facet value (city, topic, budget tier, normalized requirement tag,
+status) maps to a bitset stored as a Python int, with bit N set when card N
+has that value.
+Combined filters are bitwise ANDs. The index also keeps each card's
+updated_at, so `page` orders the matches the way the card list is paged and
+the database only loads the cards of one page.
+
+Writes made by this process are applied immediately through `upsert`; writes
+made by other workers are picked up by `refresh`, which at most every
+`refresh_seconds` re-reads cards whose updated_at is past the last watermark
+minus `watermark_lag_seconds`. updated_at is stamped by the application before
+commit, so a transaction that commits late can carry a timestamp older than
+the watermark; the lag covers that. Every `full_reload_seconds` the index is
+rebuilt from scratch, which also drops deleted cards.
+"""
+import heapq
+import operator
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.enums import BudgetTier, CardStatus
+from app.models.models import Card
+from app.services.tags import normalize_tags
+
+SortKey = Tuple[datetime, int]
+
+
+def _ids_from_bits(bits: int) -> List[int]:
+    digits = bin(bits)[:1:-1]
+    ids = []
+    position = digits.find("1")
+    while position != -1:
+        ids.append(position)
+        position = digits.find("1", position + 1)
+    return ids
+
+
+def _value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+class CardIndex:
+    def __init__(self, refresh_seconds: float, watermark_lag_seconds: float, full_reload_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.watermark_lag = timedelta(seconds=watermark_lag_seconds)
+        self.full_reload_seconds = full_reload_seconds
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._synced_at = 0.0
+        self._reloaded_at = 0.0
+        self._watermark: Optional[datetime] = None
+        self._facets: Dict[int, tuple] = {}
+        self._updated_at: Dict[int, datetime] = {}
+        self._reset_bitsets()
+
+    def _reset_bitsets(self) -> None:
+        self._by_status: Dict[str, int] = defaultdict(int)
+        self._by_city: Dict[int, int] = defaultdict(int)
+        self._by_topic: Dict[int, int] = defaultdict(int)
+        self._by_budget: Dict[str, int] = defaultdict(int)
+        self._by_requirement: Dict[str, int] = defaultdict(int)
+
+    def _bitsets_for(self, facets: tuple):
+        status, city_id, topic_id, budget_tier, requirements = facets
+        yield self._by_status, status
+        yield self._by_city, city_id
+        yield self._by_topic, topic_id
+        yield self._by_budget, budget_tier
+        for requirement in requirements:
+            yield self._by_requirement, requirement
+
+    def _apply(self, card_id: int, facets: Optional[tuple], updated_at: Optional[datetime]) -> None:
+        bit = 1 << card_id
+        previous = self._facets.pop(card_id, None)
+        self._updated_at.pop(card_id, None)
+        if previous is not None:
+            for bitsets, key in self._bitsets_for(previous):
+                bitsets[key] &= ~bit
+                if not bitsets[key]:
+                    del bitsets[key]
+        if facets is not None:
+            self._facets[card_id] = facets
+            self._updated_at[card_id] = updated_at
+            for bitsets, key in self._bitsets_for(facets):
+                bitsets[key] |= bit
+
+    @staticmethod
+    def _facets_of(row) -> tuple:
+        requirements = frozenset(normalize_tags(row.requirements))
+        return (_value(row.status), row.city_id, row.topic_id, _value(row.budget_tier), requirements)
+
+    def _load(self, rows: Iterable) -> None:
+        for row in rows:
+            self._apply(row.id, self._facets_of(row), row.updated_at)
+            if self._watermark is None or row.updated_at > self._watermark:
+                self._watermark = row.updated_at
+
+    def _fresh(self) -> bool:
+        return self._loaded and time.monotonic() - self._synced_at < self.refresh_seconds
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        """Load the index on first use, then pull cards changed by other workers.
+
+        The rows are read without holding the lock: under `AsyncSession.run_sync`
+        the query awaits on the event loop thread, and a request blocked on a
+        thread lock there would stall the loop for good.
+        """
+        if not force and self._fresh():
+            return
+        with self._lock:
+            if not force and self._fresh():
+                return
+            now = time.monotonic()
+            full = (
+                force
+                or not self._loaded
+                or self._watermark is None
+                or now - self._reloaded_at >= self.full_reload_seconds
+            )
+            since = None if full else self._watermark - self.watermark_lag
+            previous_sync = self._synced_at
+            # Concurrent callers keep serving the current index instead of repeating the query
+            self._synced_at = now
+        query = db.query(
+            Card.id, Card.status, Card.city_id, Card.topic_id, Card.budget_tier, Card.requirements, Card.updated_at
+        )
+        if since is not None:
+            # Re-applying an unchanged card is a no-op, so overlapping windows are harmless
+            query = query.filter(Card.updated_at >= since)
+        try:
+            rows = query.all()
+        except Exception:
+            self._synced_at = previous_sync
+            raise
+        with self._lock:
+            if full:
+                self._facets.clear()
+                self._updated_at.clear()
+                self._reset_bitsets()
+                self._watermark = None
+                self._reloaded_at = now
+            self._load(rows)
+            self._loaded = True
+
+    def upsert(self, card: Card) -> None:
+        """Apply a card this process just committed."""
+        with self._lock:
+            if self._loaded:
+                self._apply(card.id, self._facets_of(card), card.updated_at)
+
+    def _filter_bits(self, include_drafts, city_id, topic_id, budget_tier, requirements) -> int:
+        if include_drafts:
+            bits = reduce(operator.or_, self._by_status.values(), 0)
+        else:
+            bits = self._by_status.get(CardStatus.published.value, 0)
+        if city_id:
+            bits &= self._by_city.get(city_id, 0)
+        if topic_id:
+            bits &= self._by_topic.get(topic_id, 0)
+        if budget_tier:
+            bits &= self._by_budget.get(budget_tier.value, 0)
+        for requirement in requirements:
+            bits &= self._by_requirement.get(requirement, 0)
+        return bits
+
+    def page(
+        self,
+        db: Session,
+        limit: int,
+        after: Optional[SortKey] = None,
+        city_id: Optional[int] = None,
+        topic_id: Optional[int] = None,
+        budget_tier: Optional[BudgetTier] = None,
+        requirements: Iterable[str] = (),
+        include_drafts: bool = False,
+    ) -> List[SortKey]:
+        """(updated_at, id) of up to `limit` matching cards, newest first, strictly after `after`.
+
+        Same order as the card list's keyset (updated_at desc, id desc), so its
+        cursors work for both.
+        """
+        self.refresh(db)
+        with self._lock:
+            bits = self._filter_bits(include_drafts, city_id, topic_id, budget_tier, requirements)
+            keys = ((self._updated_at[card_id], card_id) for card_id in _ids_from_bits(bits))
+            if after is not None:
+                keys = (key for key in keys if key < after)
+            return heapq.nlargest(limit, keys)
+
+    def facet_counts(
+        self,
+        db: Session,
+        city_id: Optional[int] = None,
+        topic_id: Optional[int] = None,
+        budget_tier: Optional[BudgetTier] = None,
+        requirements: Iterable[str] = (),
+        include_drafts: bool = False,
+    ) -> dict:
+        """Card counts per facet value under the given filters.
+
+        City, topic and budget tier are single-choice, so each is counted with
+        every filter except its own; requirements narrow together, so they are
+        counted against all filters.
+        """
+        requirements = list(requirements)
+        self.refresh(db)
+        with self._lock:
+            everything = self._filter_bits(include_drafts, city_id, topic_id, budget_tier, requirements)
+            scopes = {
+                "city": (self._by_city, self._filter_bits(include_drafts, None, topic_id, budget_tier, requirements)),
+                "topic": (self._by_topic, self._filter_bits(include_drafts, city_id, None, budget_tier, requirements)),
+                "budget_tier": (self._by_budget, self._filter_bits(include_drafts, city_id, topic_id, None, requirements)),
+                "requirements": (self._by_requirement, everything),
+            }
+            counts = {"total": everything.bit_count()}
+            for facet, (bitsets, scope) in scopes.items():
+                facet_counts = {}
+                for key, bits in bitsets.items():
+                    count = (bits & scope).bit_count()
+                    if count:
+                        facet_counts[key] = count
+                counts[facet] = facet_counts
+        return counts
+
+
+card_index = CardIndex(
+    refresh_seconds=settings.card_index_refresh_seconds,
+    watermark_lag_seconds=settings.card_index_watermark_lag_seconds,
+    full_reload_seconds=settings.card_index_full_reload_seconds,
+)
@@ -0,0 +1,319 @@
+"""Bulk import of questions, answers and reactions from NDJSON exports.
+
+Records are written in chunks, one transaction per chunk. Users, cities,
+topics and referenced rows are resolved with one IN query per kind. Rows go
+in through executemany (multi-row VALUES, with RETURNING where later records
+need the new ids), and thread and reputation counters are bumped once per
+chunk.
+
+A record that fails validation or can't be resolved is reported with its
+line number and skipped. If the database rejects a whole chunk, the chunk is
+retried one record at a time, so only the offending records are lost.
+
+`ref` values (ids from the source export) are remembered for the lifetime of
+an Importer, so answers and reactions can point at questions and answers
+imported earlier in the same run.
+"""
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_insert
+from app.models.enums import BudgetTier, EntityType, ReactionType
+from app.models.models import Answer, Card, City, Question, QuestionTag, Reaction, Topic, User, UserProfile
+from app.schemas.requests import ImportRecord
+from app.services import tags, thread_stats, user_stats
+from app.services.accounts import DEFAULT_MEMBER_EMAIL
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+_records = TypeAdapter(ImportRecord)
+
+
+@dataclass
+class ImportReport:
+    lines: int = 0
+    inserted: Counter = field(default_factory=Counter)
+    error_count: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    def error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "lines": self.lines,
+            "inserted": {kind: self.inserted[kind] for kind in ("question", "answer", "reaction")},
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def _validation_message(exc: ValidationError) -> str:
+    first = exc.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+def _utc(value: Optional[datetime], default: datetime) -> datetime:
+    # The schema stores naive UTC timestamps
+    if value is None:
+        return default
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class Importer:
+    def __init__(self, db: Session, chunk_size: int = CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.report = ImportReport()
+        self.refs: Dict[str, Dict[str, int]] = {"question": {}, "answer": {}}
+        self._pending: List[Tuple[int, object]] = []
+
+    def add_line(self, line: Union[str, bytes]) -> None:
+        self.report.lines += 1
+        if not line.strip():
+            return
+        try:
+            record = _records.validate_json(line)
+        except ValidationError as exc:
+            self.report.error(self.report.lines, _validation_message(exc))
+            return
+        self._pending.append((self.report.lines, record))
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def add_lines(self, lines: Iterable[Union[str, bytes]]) -> None:
+        for line in lines:
+            self.add_line(line)
+
+    def flush(self) -> None:
+        chunk, self._pending = self._pending, []
+        if chunk:
+            self._import(chunk)
+
+    def finish(self) -> ImportReport:
+        self.flush()
+        return self.report
+
+    def _import(self, chunk) -> None:
+        try:
+            result = _Chunk(self.db, self.refs).write(chunk)
+            self.db.commit()
+        except SQLAlchemyError as exc:
+            self.db.rollback()
+            if len(chunk) > 1:
+                for item in chunk:
+                    self._import([item])
+            else:
+                self.report.error(chunk[0][0], f"rejected by the database: {getattr(exc, 'orig', exc)}")
+            return
+        for kind, refs in result.refs.items():
+            self.refs[kind].update(refs)
+        self.report.inserted.update(result.inserted)
+        for line, message in result.errors:
+            self.report.error(line, message)
+
+
+class _Chunk:
+    """One transaction's worth of records; nothing here is kept unless the caller commits."""
+
+    def __init__(self, db: Session, known_refs: Dict[str, Dict[str, int]]):
+        self.db = db
+        self.known_refs = known_refs
+        self.refs: Dict[str, Dict[str, int]] = {"question": {}, "answer": {}}
+        self.inserted: Counter = Counter()
+        self.errors: List[Tuple[int, str]] = []
+        self.answer_authors: Dict[int, int] = {}
+        self.now = datetime.utcnow()
+
+    def write(self, chunk) -> "_Chunk":
+        by_type = defaultdict(list)
+        for line, record in chunk:
+            by_type[record.type].append((line, record))
+        self.user_ids = self._user_ids({record.email or DEFAULT_MEMBER_EMAIL for _, record in chunk})
+        self._questions(by_type["question"])
+        self._answers(by_type["answer"])
+        self._reactions(by_type["reaction"])
+        return self
+
+    def _ref(self, kind: str, ref: Optional[str]) -> Optional[int]:
+        if ref is None:
+            return None
+        return self.refs[kind].get(ref) or self.known_refs[kind].get(ref)
+
+    def _existing_ids(self, model, ids: Set[int]) -> Set[int]:
+        if not ids:
+            return set()
+        return set(self.db.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+    def _ids_by_name(self, model, names: Set[str]) -> Dict[str, int]:
+        if not names:
+            return {}
+        lowered = {name.lower() for name in names}
+        name = func.lower(model.name)
+        return dict(self.db.execute(select(name, model.id).where(name.in_(lowered))).all())
+
+    def _user_ids(self, emails: Set[str]) -> Dict[str, int]:
+        found = dict(self.db.execute(select(User.email, User.id).where(User.email.in_(emails))).all())
+        missing = emails - found.keys()
+        if missing:
+            self.db.execute(
+                dialect_insert(self.db, User)
+                .values([{"email": email, "is_admin": False} for email in missing])
+                .on_conflict_do_nothing(index_elements=[User.email])
+            )
+            created = dict(self.db.execute(select(User.email, User.id).where(User.email.in_(missing))).all())
+            self.db.execute(
+                dialect_insert(self.db, UserProfile)
+                .values([{"user_id": user_id, "cities_of_experience": []} for user_id in created.values()])
+                .on_conflict_do_nothing(index_elements=[UserProfile.user_id])
+            )
+            found.update(created)
+        return found
+
+    def _resolve(self, explicit_id, name, known_ids: Set[int], ids_by_name: Dict[str, int]) -> Optional[int]:
+        if explicit_id is not None:
+            return explicit_id if explicit_id in known_ids else None
+        return ids_by_name.get(name.lower()) if name else None
+
+    def _questions(self, records) -> None:
+        if not records:
+            return
+        city_ids = self._existing_ids(City, {r.city_id for _, r in records if r.city_id is not None})
+        topic_ids = self._existing_ids(Topic, {r.topic_id for _, r in records if r.topic_id is not None})
+        cities = self._ids_by_name(City, {r.city for _, r in records if r.city and r.city_id is None})
+        topics = self._ids_by_name(Topic, {r.topic for _, r in records if r.topic and r.topic_id is None})
+        rows, accepted = [], []
+        for line, record in records:
+            city_id = self._resolve(record.city_id, record.city, city_ids, cities)
+            topic_id = self._resolve(record.topic_id, record.topic, topic_ids, topics)
+            if city_id is None:
+                self.errors.append((line, f"unknown city: {record.city_id or record.city}"))
+                continue
+            if topic_id is None:
+                self.errors.append((line, f"unknown topic: {record.topic_id or record.topic}"))
+                continue
+            created_at = _utc(record.created_at, self.now)
+            rows.append(
+                {
+                    "city_id": city_id,
+                    "topic_id": topic_id,
+                    "author_id": self.user_ids[record.email or DEFAULT_MEMBER_EMAIL],
+                    "duration": record.duration,
+                    "budget_tier": BudgetTier(record.budget_tier),
+                    "requirements": record.requirements,
+                    "question_text": record.question_text,
+                    "created_at": created_at,
+                    "last_activity_at": created_at,
+                }
+            )
+            accepted.append(record)
+        if not rows:
+            return
+        ids = self.db.execute(insert(Question).returning(Question.id, sort_by_parameter_order=True), rows).scalars().all()
+        for question_id, record in zip(ids, accepted):
+            if record.ref is not None:
+                self.refs["question"][record.ref] = question_id
+        tags.link_tags(
+            self.db, QuestionTag, "question_id", {question_id: r.requirements for question_id, r in zip(ids, accepted)}
+        )
+        self.inserted["question"] += len(ids)
+
+    def _answers(self, records) -> None:
+        if not records:
+            return
+        question_ids = self._existing_ids(Question, {r.question_id for _, r in records if r.question_id is not None})
+        rows, accepted = [], []
+        for line, record in records:
+            if record.question_id is not None:
+                question_id = record.question_id if record.question_id in question_ids else None
+            else:
+                question_id = self._ref("question", record.question_ref)
+            if question_id is None:
+                self.errors.append((line, f"unknown question: {record.question_id or record.question_ref}"))
+                continue
+            rows.append(
+                {
+                    "question_id": question_id,
+                    "user_id": self.user_ids[record.email or DEFAULT_MEMBER_EMAIL],
+                    "answer_text": record.answer_text,
+                    "context": record.context or {},
+                    "media_url": record.media_url,
+                    "created_at": _utc(record.created_at, self.now),
+                }
+            )
+            accepted.append(record)
+        if not rows:
+            return
+        ids = self.db.execute(insert(Answer).returning(Answer.id, sort_by_parameter_order=True), rows).scalars().all()
+        per_question: Dict[int, Tuple[int, datetime]] = {}
+        for answer_id, record, row in zip(ids, accepted, rows):
+            if record.ref is not None:
+                self.refs["answer"][record.ref] = answer_id
+            self.answer_authors[answer_id] = row["user_id"]
+            added, latest = per_question.get(row["question_id"], (0, row["created_at"]))
+            per_question[row["question_id"]] = (added + 1, max(latest, row["created_at"]))
+        thread_stats.record_answer_batch(self.db, per_question)
+        self.inserted["answer"] += len(ids)
+
+    def _reactions(self, records) -> None:
+        if not records:
+            return
+        models = {"question": Question, "answer": Answer, "card": Card}
+        existing = {
+            entity_type: self._existing_ids(
+                model, {r.entity_id for _, r in records if r.entity_type == entity_type and r.entity_id is not None}
+            )
+            for entity_type, model in models.items()
+        }
+        rows = []
+        for line, record in records:
+            if record.reaction_type == ReactionType.helped.value and record.entity_type != EntityType.answer.value:
+                self.errors.append((line, "helped only for answers"))
+                continue
+            if record.reaction_type == ReactionType.saved.value and record.entity_type == EntityType.question.value:
+                self.errors.append((line, "save only for answers and cards"))
+                continue
+            if record.entity_id is not None:
+                entity_id = record.entity_id if record.entity_id in existing[record.entity_type] else None
+            else:
+                entity_id = self._ref(record.entity_type, record.entity_ref) if record.entity_type != "card" else None
+            if entity_id is None:
+                self.errors.append((line, f"unknown {record.entity_type}: {record.entity_id or record.entity_ref}"))
+                continue
+            rows.append(
+                {
+                    "user_id": self.user_ids[record.email or DEFAULT_MEMBER_EMAIL],
+                    "entity_type": EntityType(record.entity_type),
+                    "entity_id": entity_id,
+                    "reaction_type": ReactionType(record.reaction_type),
+                    "created_at": _utc(record.created_at, self.now),
+                }
+            )
+        if not rows:
+            return
+        self.db.execute(insert(Reaction), rows)
+        self.inserted["reaction"] += len(rows)
+
+        question_votes = Counter(row["entity_id"] for row in rows if row["entity_type"] == EntityType.question)
+        thread_stats.record_question_reaction_batch(self.db, question_votes)
+        answer_reactions = [row for row in rows if row["entity_type"] == EntityType.answer]
+        authors = dict(self.answer_authors)
+        unknown = {row["entity_id"] for row in answer_reactions} - authors.keys()
+        if unknown:
+            authors.update(self.db.execute(select(Answer.id, Answer.user_id).where(Answer.id.in_(unknown))).all())
+        user_stats.record_reaction_batch(
+            self.db, ((authors[row["entity_id"]], row["reaction_type"]) for row in answer_reactions)
+        )
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.models.models import OtpCode
+
+logger = logging.getLogger("travel_decision")
+
+
+def consume_code(db: Session, email: str, code: str) -> bool:
+    """Mark the newest live matching code as used; False if there is none.
+
+    One UPDATE ... RETURNING, so two concurrent verifications of the same code
+    can't both succeed: the loser finds used_at already set. The caller commits.
+    """
+    now = datetime.utcnow()
+    newest_live = (
+        select(OtpCode.id)
+        .where(
+            OtpCode.email == email,
+            OtpCode.code == code,
+            OtpCode.expires_at >= now,
+            OtpCode.used_at.is_(None),
+        )
+        .order_by(OtpCode.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    consumed = db.execute(
+        update(OtpCode)
+        .where(OtpCode.id == newest_live, OtpCode.used_at.is_(None))
+        .values(used_at=now)
+        .returning(OtpCode.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return consumed is not None
+
+
+def purge_expired_codes(db: Session, batch_size: int = 1000) -> int:
+    """Delete expired codes (used or not), one bounded batch per transaction."""
+    now = datetime.utcnow()
+    deleted = 0
+    while True:
+        batch = select(OtpCode.id).where(OtpCode.expires_at < now).limit(batch_size).scalar_subquery()
+        result = db.execute(delete(OtpCode).where(OtpCode.id.in_(batch)).execution_options(synchronize_session=False))
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def _purge_once() -> int:
+    db = SessionLocal()
+    try:
+        return purge_expired_codes(db)
+    finally:
+        db.close()
+
+
+async def purge_periodically(interval_seconds: float) -> None:
+    """Background loop for the app process; every worker may run it, batches keep it cheap."""
+    while True:
+        try:
+            deleted = await asyncio.to_thread(_purge_once)
+            if deleted:
+                logger.info("Purged %s expired OTP codes", deleted)
+        except Exception:
+            logger.exception("OTP purge failed")
+        await asyncio.sleep(interval_seconds)
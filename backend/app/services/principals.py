@@ -0,0 +1,144 @@
+"""Who is calling, without a users query per request.
+
+Tokens carry user_id and is_admin claims, so a verified token is enough to
+build a `Principal`. Decoded tokens are kept in a small TTL/LRU cache to skip
+repeated signature checks. User rows are cached separately, for two cases that
+still need the database: tokens issued before the claims existed (only an
+email in `sub`) and admin routes, which re-check is_admin so a revoked admin
+loses access within the TTL rather than at token expiry.
+
+ORM commits that change or delete a User drop that user's cached row in this
+process; other workers pick the change up when their entry expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.models.models import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    email: str
+    is_admin: bool
+
+
+class TTLCache:
+    """Thread-safe LRU dict whose entries also expire at a wall-clock deadline."""
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        metrics.record_cache(self.name, hit=entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: Hashable, value, expires_at: Optional[float] = None) -> None:
+        deadline = time.time() + self.ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._entries[key] = (deadline, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TTLCache("auth_tokens", settings.auth_cache_seconds, settings.auth_cache_size)
+user_cache = TTLCache("auth_users", settings.auth_cache_seconds, settings.auth_cache_size)
+
+
+def _principal_of(row) -> Principal:
+    return Principal(user_id=row.id, email=row.email, is_admin=bool(row.is_admin))
+
+
+def load_user(db: Session, user_id: Optional[int] = None, email: Optional[str] = None) -> Optional[Principal]:
+    """Cached (id, email, is_admin) of a user by id or email; None if there is no such user."""
+    key = ("id", user_id) if user_id is not None else ("email", email)
+    principal = user_cache.get(key)
+    if principal is not None:
+        return principal
+    query = db.query(User.id, User.email, User.is_admin)
+    row = query.filter(User.id == user_id).first() if user_id is not None else query.filter(User.email == email).first()
+    if row is None:
+        return None
+    principal = _principal_of(row)
+    user_cache.set(("id", principal.user_id), principal)
+    user_cache.set(("email", principal.email), principal)
+    return principal
+
+
+def resolve_token(db: Session, token: str) -> Optional[Principal]:
+    """Principal for a bearer token; raises JWTError for a bad token, None for an unknown user."""
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
+    claims = decode_access_token(token)
+    if claims.get("user_id") is not None:
+        principal = Principal(
+            user_id=int(claims["user_id"]), email=claims.get("sub"), is_admin=bool(claims.get("is_admin"))
+        )
+    else:
+        principal = load_user(db, email=claims.get("sub"))
+        if principal is None:
+            return None
+    token_cache.set(token, principal, expires_at=claims.get("exp"))
+    return principal
+
+
+def invalidate_user(user_id: int, email: Optional[str] = None) -> None:
+    user_cache.pop(("id", user_id))
+    if email:
+        user_cache.pop(("email", email))
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_user_writes(session, flush_context):
+    changed = set()
+    for instance in (*session.dirty, *session.deleted):
+        if isinstance(instance, User):
+            changed.add((instance.id, instance.email))
+            # a renamed user must also drop the entry under the old email
+            for old_email in inspect(instance).attrs.email.history.deleted:
+                changed.add((instance.id, old_email))
+    if changed:
+        session.info.setdefault("users_changed", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for user_id, email in session.info.pop("users_changed", ()):
+        invalidate_user(user_id, email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("users_changed", None)
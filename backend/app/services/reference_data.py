@@ -0,0 +1,87 @@
+"""Process-level cache of serialized reference data (cities, topics).
+
+Each entry is the exact response body plus its ETag, stamped with the cache
+version it was built under. Commits that touch a City or Topic through the ORM,
+or write their tables with a Core statement through a Session (insert_or_ignore,
+get_or_create_id), bump the version in this process; entries also expire after
+`ttl_seconds` so writes made by other workers or scripts (seed, maintenance)
+show up.
+"""
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.http_cache import strong_etag
+from app.core import metrics
+from app.core.config import settings
+from app.models.models import City, Topic
+
+REFERENCE_MODELS = (City, Topic)
+REFERENCE_TABLES = frozenset(model.__tablename__ for model in REFERENCE_MODELS)
+
+
+class ReferenceCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries: Dict[str, tuple] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get(self, key: str, load: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """(body, etag) for `key`, calling `load` to serialize it on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            version, loaded_at, body, etag = entry
+            if version == self._version and time.monotonic() - loaded_at < self.ttl_seconds:
+                metrics.record_cache("reference_data", hit=True)
+                return body, etag
+        metrics.record_cache("reference_data", hit=False)
+        version = self._version
+        body = load()
+        etag = strong_etag(body)
+        with self._lock:
+            # An invalidation while loading means `body` may predate the write; don't keep it
+            if version == self._version:
+                self._entries[key] = (version, time.monotonic(), body, etag)
+        return body, etag
+
+
+reference_cache = ReferenceCache(ttl_seconds=settings.reference_cache_seconds)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_reference_writes(session, flush_context):
+    if any(
+        isinstance(instance, REFERENCE_MODELS)
+        for instance in (*session.new, *session.dirty, *session.deleted)
+    ):
+        session.info["reference_data_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_reference_statements(orm_execute_state):
+    # INSERT/UPDATE/DELETE statements bypass the unit of work, so after_flush never sees their rows
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in REFERENCE_TABLES:
+            orm_execute_state.session.info["reference_data_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    # After commit, not flush: a reader must not re-cache the old rows between the two
+    if session.info.pop("reference_data_changed", False):
+        reference_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("reference_data_changed", None)
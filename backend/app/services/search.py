@@ -0,0 +1,146 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import Float, bindparam, cast, func, literal, literal_column, select, text, union_all
+from sqlalchemy.orm import Session
+
+from app.api.pagination import decode_cursor, encode_cursor
+from app.models.enums import CardStatus
+from app.models.models import Answer, Card, Question
+
+SEARCH_TYPES = ("question", "answer", "card")
+
+# Каждый документ получает doc_id = id * 4 + код типа (как rowid в search_index на SQLite),
+# так что курсор (score, doc_id) одинаков для обоих бэкендов
+_KIND_CODES = {"question": 1, "answer": 2, "card": 3}
+
+
+def _snippet(value: Optional[str], length: int = 200) -> str:
+    value = value or ""
+    return value[:length] + ("…" if len(value) > length else "")
+
+
+def _item(row) -> dict:
+    return {
+        "entity_type": row.entity_type,
+        "id": row.doc_id // 4,
+        "question_id": row.question_id,
+        "city_id": row.city_id,
+        "topic_id": row.topic_id,
+        "title": row.title or _snippet(row.body, 80),
+        "snippet": _snippet(row.body),
+        "score": row.score,
+    }
+
+
+def _search_postgres(db, q, city_id, topic_id, types, limit, after):
+    ts_query = func.websearch_to_tsquery("simple", q)
+
+    def matches(table: str):
+        return literal_column(f"{table}.search_vector").op("@@")(ts_query)
+
+    def rank(table: str):
+        # ts_rank is float4; as double precision the score survives the JSON cursor exactly,
+        # so `score = :score` still matches the rows tied with the last one on the page
+        return cast(func.ts_rank(literal_column(f"{table}.search_vector"), ts_query), Float(precision=53)).label("score")
+
+    branches = []
+    if "question" in types:
+        branches.append(
+            select(
+                literal("question").label("entity_type"),
+                (Question.id * 4 + _KIND_CODES["question"]).label("doc_id"),
+                Question.id.label("question_id"),
+                Question.city_id.label("city_id"),
+                Question.topic_id.label("topic_id"),
+                literal("").label("title"),
+                Question.question_text.label("body"),
+                rank("questions"),
+            ).where(matches("questions"))
+        )
+    if "answer" in types:
+        branches.append(
+            select(
+                literal("answer").label("entity_type"),
+                (Answer.id * 4 + _KIND_CODES["answer"]).label("doc_id"),
+                Answer.question_id.label("question_id"),
+                Question.city_id.label("city_id"),
+                Question.topic_id.label("topic_id"),
+                literal("").label("title"),
+                Answer.answer_text.label("body"),
+                rank("answers"),
+            )
+            .join(Question, Question.id == Answer.question_id)
+            .where(matches("answers"))
+        )
+    if "card" in types:
+        branches.append(
+            select(
+                literal("card").label("entity_type"),
+                (Card.id * 4 + _KIND_CODES["card"]).label("doc_id"),
+                literal(None).label("question_id"),
+                Card.city_id.label("city_id"),
+                Card.topic_id.label("topic_id"),
+                Card.title.label("title"),
+                Card.summary.label("body"),
+                rank("cards"),
+            ).where(matches("cards"), Card.status == CardStatus.published)
+        )
+
+    hits = union_all(*branches).subquery()
+    query = select(hits)
+    if city_id:
+        query = query.where(hits.c.city_id == city_id)
+    if topic_id:
+        query = query.where(hits.c.topic_id == topic_id)
+    if after:
+        score, doc_id = after
+        query = query.where((hits.c.score < score) | ((hits.c.score == score) & (hits.c.doc_id > doc_id)))
+    query = query.order_by(hits.c.score.desc(), hits.c.doc_id.asc()).limit(limit)
+    return db.execute(query).all()
+
+
+def _search_sqlite(db, q, city_id, topic_id, types, limit, after):
+    # Каждое слово в кавычках: ввод пользователя не интерпретируется как синтаксис FTS5
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return []
+    params = {"match": " ".join(f'"{token}"' for token in tokens), "types": list(types), "limit": limit}
+    sql = (
+        "SELECT rowid AS doc_id, title, body, entity_type, question_id, city_id, topic_id, -rank AS score "
+        "FROM search_index WHERE search_index MATCH :match AND entity_type IN :types"
+    )
+    if city_id:
+        sql += " AND city_id = :city_id"
+        params["city_id"] = city_id
+    if topic_id:
+        sql += " AND topic_id = :topic_id"
+        params["topic_id"] = topic_id
+    if after:
+        sql += " AND (rank > :rank OR (rank = :rank AND rowid > :doc_id))"
+        params["rank"], params["doc_id"] = -after[0], after[1]
+    sql += " ORDER BY rank, rowid LIMIT :limit"
+    statement = text(sql).bindparams(bindparam("types", expanding=True))
+    return db.execute(statement, params).all()
+
+
+def search(
+    db: Session,
+    q: str,
+    city_id: Optional[int] = None,
+    topic_id: Optional[int] = None,
+    types: List[str] = SEARCH_TYPES,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+):
+    """Ranked full-text search over questions, answers and published cards.
+
+    Returns (items, next_cursor); items are ordered by descending score.
+    """
+    after = decode_cursor(cursor, float, int) if cursor else None
+    if db.get_bind().dialect.name == "postgresql":
+        rows = _search_postgres(db, q, city_id, topic_id, types, limit, after)
+    else:
+        rows = _search_sqlite(db, q, city_id, topic_id, types, limit, after)
+    next_cursor = encode_cursor(rows[-1].score, rows[-1].doc_id) if len(rows) == limit else None
+    return [_item(row) for row in rows], next_cursor
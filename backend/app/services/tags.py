@@ -0,0 +1,129 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_insert
+from app.models.models import Card, CardTag, Question, QuestionTag, Tag
+
+# Варианты написания, которые означают одно и то же требование
+TAG_ALIASES = {
+    "wifi": "good_internet",
+    "fast_wifi": "good_internet",
+    "fast_internet": "good_internet",
+    "internet": "good_internet",
+    "quiet_area": "quiet",
+    "walkability": "walkable",
+    "safe": "safe_at_night",
+    "coworking": "coworking_near",
+}
+
+
+def normalize_tag(raw: Optional[str]) -> Optional[str]:
+    """Lowercase, collapse separators to underscores and fold known aliases."""
+    if not raw:
+        return None
+    name = re.sub(r"[\s\-/]+", "_", raw.strip().lower())
+    name = re.sub(r"[^\w]", "", name).strip("_")
+    if not name:
+        return None
+    return TAG_ALIASES.get(name, name)[:80]
+
+
+def normalize_tags(raw_tags: Optional[Iterable[str]]) -> List[str]:
+    names = []
+    for raw in raw_tags or []:
+        name = normalize_tag(raw)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def find_tag_ids(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    names = list(names)
+    if not names:
+        return {}
+    return dict(db.query(Tag.name, Tag.id).filter(Tag.name.in_(names)).all())
+
+
+def ensure_tag_ids(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Ids for `names`, inserting missing tags (concurrency-safe via ON CONFLICT DO NOTHING)."""
+    names = list(names)
+    tag_ids = find_tag_ids(db, names)
+    missing = [name for name in names if name not in tag_ids]
+    if missing:
+        db.execute(
+            dialect_insert(db, Tag).values([{"name": name} for name in missing]).on_conflict_do_nothing(
+                index_elements=[Tag.name]
+            )
+        )
+        tag_ids = find_tag_ids(db, names)
+    return tag_ids
+
+
+def set_question_tags(db: Session, question_id: int, requirements: Optional[Iterable[str]]) -> None:
+    """Replace a question's tag links; the caller commits."""
+    tag_ids = ensure_tag_ids(db, normalize_tags(requirements))
+    db.query(QuestionTag).filter(QuestionTag.question_id == question_id).delete(synchronize_session=False)
+    db.add_all(QuestionTag(question_id=question_id, tag_id=tag_id) for tag_id in tag_ids.values())
+
+
+def set_card_tags(db: Session, card_id: int, requirements: Optional[Iterable[str]]) -> None:
+    """Replace a card's tag links; the caller commits."""
+    tag_ids = ensure_tag_ids(db, normalize_tags(requirements))
+    db.query(CardTag).filter(CardTag.card_id == card_id).delete(synchronize_session=False)
+    db.add_all(CardTag(card_id=card_id, tag_id=tag_id) for tag_id in tag_ids.values())
+
+
+def link_tags(db: Session, link_model, key: str, requirements_by_id: Dict[int, Iterable[str]]) -> int:
+    """Add tag links for many new entities at once (no existing links are removed); the caller commits."""
+    names_by_id = {entity_id: normalize_tags(requirements) for entity_id, requirements in requirements_by_id.items()}
+    tag_ids = ensure_tag_ids(db, {name for names in names_by_id.values() for name in names})
+    links = [
+        {key: entity_id, "tag_id": tag_ids[name]}
+        for entity_id, names in names_by_id.items()
+        for name in names
+    ]
+    if links:
+        # executemany rather than one multi-row VALUES: the statement compiles once and stays cached
+        db.execute(dialect_insert(db, link_model).on_conflict_do_nothing(), links)
+    return len(links)
+
+
+def tagged_with_all(db: Session, link_model, entity_column, raw_tags: Iterable[str]):
+    """Subquery of entity ids linked to every tag, resolved through the (tag_id, entity_id) index.
+
+    Returns None when a tag is unknown, since nothing can match then.
+    """
+    names = normalize_tags(raw_tags)
+    tag_ids = find_tag_ids(db, names)
+    if len(tag_ids) < len(names):
+        return None
+    return (
+        select(entity_column)
+        .where(link_model.tag_id.in_(tag_ids.values()))
+        .group_by(entity_column)
+        .having(func.count(link_model.tag_id) == len(tag_ids))
+    )
+
+
+def backfill_tags(db: Session, batch_size: int = 1000) -> int:
+    """Link existing questions and cards to tags from their JSON requirements, one id batch per commit."""
+    linked = 0
+    for model, link_model, key in ((Question, QuestionTag, "question_id"), (Card, CardTag, "card_id")):
+        last_id = 0
+        while True:
+            rows = (
+                db.query(model.id, model.requirements)
+                .filter(model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            linked += link_tags(db, link_model, key, {row.id: row.requirements for row in rows})
+            db.commit()
+            last_id = rows[-1].id
+    return linked
@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Dict, Tuple
+
+from sqlalchemy import DateTime, bindparam, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.enums import EntityType
+from app.models.models import Answer, Question, Reaction
+
+
+def record_answer(db: Session, question_id: int, created_at: datetime) -> bool:
+    """Bump thread stats for a new answer; False if there is no such question. The caller commits."""
+    result = db.execute(
+        update(Question)
+        .where(Question.id == question_id)
+        .values(
+            answer_count=Question.answer_count + 1,
+            last_message_at=created_at,
+            last_activity_at=created_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def record_question_reaction(db: Session, question_id: int) -> None:
+    """Bump vote_score for a reaction on a question; the caller commits."""
+    db.execute(
+        update(Question)
+        .where(Question.id == question_id)
+        .values(vote_score=Question.vote_score + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_answer_batch(db: Session, answers_by_question: Dict[int, Tuple[int, datetime]]) -> None:
+    """Apply many answers at once: {question_id: (new answers, latest created_at)}; the caller commits.
+
+    Imported answers may be older than what the thread already has, so the
+    timestamps only ever move forward.
+    """
+    if not answers_by_question:
+        return
+    questions = Question.__table__
+    latest = bindparam("latest", type_=DateTime)
+
+    def forward(column):
+        return case((or_(column.is_(None), column < latest), latest), else_=column)
+
+    db.execute(
+        update(questions)
+        .where(questions.c.id == bindparam("question_id"))
+        .values(
+            answer_count=questions.c.answer_count + bindparam("added"),
+            last_message_at=forward(questions.c.last_message_at),
+            last_activity_at=forward(questions.c.last_activity_at),
+        ),
+        [
+            {"question_id": question_id, "added": added, "latest": latest_at}
+            for question_id, (added, latest_at) in answers_by_question.items()
+        ],
+    )
+
+
+def record_question_reaction_batch(db: Session, reactions_by_question: Dict[int, int]) -> None:
+    """Add {question_id: reaction count} to vote_score in one executemany; the caller commits."""
+    if not reactions_by_question:
+        return
+    questions = Question.__table__
+    db.execute(
+        update(questions)
+        .where(questions.c.id == bindparam("question_id"))
+        .values(vote_score=questions.c.vote_score + bindparam("added")),
+        [{"question_id": question_id, "added": added} for question_id, added in reactions_by_question.items()],
+    )
+
+
+def rebuild_thread_stats(db: Session, batch_size: int = 5000) -> int:
+    """Recompute thread stats from answers and reactions, one id range per transaction."""
+    last_message_at = (
+        select(func.max(Answer.created_at)).where(Answer.question_id == Question.id).scalar_subquery()
+    )
+    answer_count = select(func.count(Answer.id)).where(Answer.question_id == Question.id).scalar_subquery()
+    vote_score = (
+        select(func.count(Reaction.id))
+        .where(Reaction.entity_type == EntityType.question, Reaction.entity_id == Question.id)
+        .scalar_subquery()
+    )
+
+    max_id = db.query(func.max(Question.id)).scalar() or 0
+    updated = 0
+    for start in range(0, max_id, batch_size):
+        result = db.execute(
+            update(Question)
+            .where(Question.id > start, Question.id <= start + batch_size)
+            .values(
+                last_message_at=last_message_at,
+                last_activity_at=func.coalesce(last_message_at, Question.created_at),
+                answer_count=answer_count,
+                vote_score=vote_score,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        updated += result.rowcount
+    return updated
@@ -0,0 +1,87 @@
+from collections import Counter
+from typing import Iterable, Tuple
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_insert
+from app.models.enums import EntityType, ReactionType
+from app.models.models import Answer, CardSource, Reaction, User, UserStats
+
+
+def _increment(db: Session, user_id: int, **deltas: int) -> None:
+    # INSERT ... ON CONFLICT DO UPDATE keeps concurrent increments atomic
+    stmt = dialect_insert(db, UserStats).values(user_id=user_id, **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={name: getattr(UserStats, name) + stmt.excluded[name] for name in deltas},
+    )
+    db.execute(stmt)
+
+
+def record_answer_reaction(db: Session, answer_author_id: int, reaction_type: ReactionType) -> None:
+    """Count a helped/save reaction towards the answer author; the caller commits."""
+    if reaction_type == ReactionType.helped:
+        _increment(db, answer_author_id, helped_count=1)
+    elif reaction_type == ReactionType.saved:
+        _increment(db, answer_author_id, saves_count=1)
+
+
+def record_reaction_batch(db: Session, reactions: Iterable[Tuple[int, ReactionType]]) -> None:
+    """record_answer_reaction for many (answer author id, reaction type) pairs, one upsert per author."""
+    deltas = {}
+    for user_id, reaction_type in reactions:
+        counters = deltas.setdefault(user_id, Counter())
+        if reaction_type == ReactionType.helped:
+            counters["helped_count"] += 1
+        elif reaction_type == ReactionType.saved:
+            counters["saves_count"] += 1
+    for user_id, counters in deltas.items():
+        if counters:
+            _increment(db, user_id, **counters)
+
+
+def record_card_sources(db: Session, answers: Iterable[Answer]) -> None:
+    """Count answers quoted by a new card towards their authors; the caller commits."""
+    for user_id, used in Counter(answer.user_id for answer in answers).items():
+        _increment(db, user_id, cards_used=used)
+
+
+def reconcile_user_stats(db: Session) -> int:
+    """Rebuild user_stats from reactions and card sources in one transaction."""
+    reactions = (
+        select(
+            Answer.user_id.label("user_id"),
+            func.sum(case((Reaction.reaction_type == ReactionType.helped, 1), else_=0)).label("helped"),
+            func.sum(case((Reaction.reaction_type == ReactionType.saved, 1), else_=0)).label("saves"),
+        )
+        .join(Reaction, Reaction.entity_id == Answer.id)
+        .where(Reaction.entity_type == EntityType.answer)
+        .group_by(Answer.user_id)
+        .subquery()
+    )
+    sources = (
+        select(Answer.user_id.label("user_id"), func.count(CardSource.id).label("used"))
+        .join(CardSource, CardSource.answer_id == Answer.id)
+        .group_by(Answer.user_id)
+        .subquery()
+    )
+    rows = (
+        select(
+            User.id,
+            func.coalesce(reactions.c.helped, 0),
+            func.coalesce(reactions.c.saves, 0),
+            func.coalesce(sources.c.used, 0),
+        )
+        .outerjoin(reactions, reactions.c.user_id == User.id)
+        .outerjoin(sources, sources.c.user_id == User.id)
+    )
+    db.execute(delete(UserStats))
+    result = db.execute(
+        insert(UserStats).from_select(
+            [UserStats.user_id, UserStats.helped_count, UserStats.saves_count, UserStats.cards_used],
+            rows,
+        )
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,67 @@
+import argparse
+import json
+import sys
+
+from app.core.db import SessionLocal
+from app.models.search import rebuild_search_index
+from app.services.ingest import CHUNK_SIZE, Importer
+from app.services.otp import purge_expired_codes
+from app.services.tags import backfill_tags
+from app.services.thread_stats import rebuild_thread_stats
+from app.services.user_stats import reconcile_user_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Travel Decision maintenance tasks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-thread-stats", help="Recompute denormalized thread stats")
+    rebuild.add_argument("--batch-size", type=int, default=5000)
+
+    subparsers.add_parser("reconcile-user-stats", help="Rebuild contributor reputation counters from scratch")
+    subparsers.add_parser("rebuild-search-index", help="Refill the SQLite full-text index")
+
+    tags = subparsers.add_parser("backfill-tags", help="Link questions and cards to normalized requirement tags")
+    tags.add_argument("--batch-size", type=int, default=1000)
+
+    purge = subparsers.add_parser("purge-otp-codes", help="Delete expired one-time login codes")
+    purge.add_argument("--batch-size", type=int, default=1000)
+
+    ingest = subparsers.add_parser("import", help="Bulk import questions, answers and reactions from NDJSON")
+    ingest.add_argument("path", help="NDJSON file, or - for stdin")
+    ingest.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    args = parser.parse_args()
+    session = SessionLocal()
+    try:
+        if args.command == "rebuild-thread-stats":
+            updated = rebuild_thread_stats(session, batch_size=args.batch_size)
+            print(f"Rebuilt thread stats for {updated} questions")
+        elif args.command == "reconcile-user-stats":
+            rebuilt = reconcile_user_stats(session)
+            print(f"Reconciled reputation counters for {rebuilt} users")
+        elif args.command == "rebuild-search-index":
+            rebuild_search_index(session.connection())
+            session.commit()
+            print("Search index rebuilt")
+        elif args.command == "backfill-tags":
+            linked = backfill_tags(session, batch_size=args.batch_size)
+            print(f"Linked {linked} requirement tags")
+        elif args.command == "purge-otp-codes":
+            deleted = purge_expired_codes(session, batch_size=args.batch_size)
+            print(f"Deleted {deleted} expired OTP codes")
+        elif args.command == "import":
+            importer = Importer(session, chunk_size=args.chunk_size)
+            source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+            with source:
+                importer.add_lines(source)
+            report = importer.finish()
+            for error in report.errors:
+                print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+            print(json.dumps({key: value for key, value in report.as_dict().items() if key != "errors"}))
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
-from datetime import datetime
+import argparse
+import bisect
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
 
+from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
 
 from app.core.db import SessionLocal, engine, Base
-from app.models.enums import BudgetTier, CardStatus, QuestionStatus
-from app.models.models import Answer, Card, CardSource, City, Question, Topic, User, UserProfile
+from app.models.enums import BudgetTier, CardStatus, EntityType, QuestionStatus, ReactionType
+from app.models.models import (
+    Answer,
+    Card,
+    CardSource,
+    City,
+    Question,
+    Reaction,
+    Topic,
+    User,
+    UserProfile,
+)
+from app.services.tags import backfill_tags
+from app.services.thread_stats import rebuild_thread_stats
+from app.services.user_stats import reconcile_user_stats
 
 
 CITIES = [
@@ -168,10 +188,264 @@ def seed(db: Session) -> None:
         db.add(a_bk)
         db.commit()
 
+        # Rows above are inserted directly, so derive the counters in one pass
+        rebuild_thread_stats(db)
+        reconcile_user_stats(db)
+        backfill_tags(db)
+
+
+# --- Synthetic data for capacity testing (python seed.py --scale N) ---
+
+SYLLABLES = ["ba", "ko", "ri", "ta", "lem", "sar", "vo", "ni", "du", "pe", "gra", "zan", "mi", "tol", "ke", "as"]
+COUNTRIES = ["Georgia", "Turkey", "UAE", "Thailand", "Indonesia", "Portugal", "Mexico", "Vietnam", "Spain", "Colombia"]
+EXTRA_TOPICS = ["Coworking", "Healthcare", "Visas", "Food", "Nightlife", "Schools", "Climate", "Banking", "Pets", "Sports"]
+# Includes aliases on purpose, so generated data exercises tag normalization
+REQUIREMENTS = [
+    "quiet", "good_internet", "walkable", "safe_at_night", "coworking_near", "wifi", "fast_wifi", "near_beach",
+    "pet_friendly", "gym", "family_friendly", "nightlife", "cheap_food", "public_transport", "green_space",
+    "english_speaking", "long_term_rental", "kitchen", "balcony", "hospital_near", "school_near", "airport_near",
+]
+WORDS = (
+    "area apartment rent month quiet cafe coworking internet safe night walk metro beach visa price "
+    "budget landlord deposit neighborhood family kids school gym market food noise view"
+).split()
+REACTION_MIX = [(ReactionType.thanks, 0.6), (ReactionType.saved, 0.25), (ReactionType.helped, 0.15)]
+BATCH_SIZE = 10000
+
+
+class ZipfSampler:
+    """Ranks 0..n-1 with P(k) proportional to 1 / (k + 1) ** exponent."""
+
+    def __init__(self, rng: random.Random, n: int, exponent: float):
+        self.rng = rng
+        self.cdf = []
+        total = 0.0
+        for rank in range(1, n + 1):
+            total += 1.0 / rank ** exponent
+            self.cdf.append(total)
+
+    def __call__(self) -> int:
+        return bisect.bisect_left(self.cdf, self.rng.random() * self.cdf[-1])
+
+
+def _recent(rng: random.Random, low: int, high: int) -> int:
+    # Skewed towards `high` (ids grow with time): roughly half the picks land in the newest tenth
+    return high - int((high - low) * rng.random() ** 3.3)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words)).capitalize() + "?"
+
+
+def _bulk_insert(model, rows, label: str) -> int:
+    """executemany in BATCH_SIZE chunks, one transaction each."""
+    table = model.__table__
+    inserted = 0
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        with engine.begin() as connection:
+            connection.execute(table.insert(), batch)
+        inserted += len(batch)
+    print(f"  {label}: {inserted}")
+    return inserted
+
+
+def _next_id(db: Session, model) -> int:
+    return (db.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def generate(db: Session, scale: int, seed_value: int = 42, anchor: datetime = datetime(2026, 1, 1)) -> None:
+    """Add about 10 * scale rows around `scale` questions; same seed and anchor, same data.
+
+    Ids are assigned here rather than by the database, so rows can reference
+    each other without reading anything back; Postgres sequences are moved
+    past them at the end.
+    """
+    rng = random.Random(seed_value)
+    started = time.monotonic()
+    span = timedelta(days=365)
+    n_users = max(50, scale // 4)
+    n_cities = min(max(scale // 500, 5), 1500)
+    n_topics = min(max(scale // 20000, 0), len(EXTRA_TOPICS))
+    n_cards = max(1, scale // 20)
+
+    first = {model: _next_id(db, model) for model in (City, Topic, User, Question, Answer, Card, Reaction)}
+    taken = set(db.execute(select(City.name)).scalars())
+    city_rows = []
+    while len(city_rows) < n_cities:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        if name not in taken:
+            taken.add(name)
+            city_rows.append({"id": first[City] + len(city_rows), "name": name, "country": rng.choice(COUNTRIES)})
+    existing_topics = set(db.execute(select(Topic.name)).scalars())
+    topic_rows = [
+        {"id": first[Topic] + index, "name": name}
+        for index, name in enumerate(name for name in EXTRA_TOPICS[:n_topics] if name not in existing_topics)
+    ]
+    print(f"Generating scale={scale} seed={seed_value}")
+    _bulk_insert(City, city_rows, "cities")
+    _bulk_insert(Topic, topic_rows, "topics")
+    city_ids = list(db.execute(select(City.id)).scalars())
+    topic_ids = list(db.execute(select(Topic.id)).scalars())
+    # A few destinations and topics get most of the traffic
+    pick_city = ZipfSampler(rng, len(city_ids), 1.1)
+    pick_topic = ZipfSampler(rng, len(topic_ids), 0.8)
+    pick_requirement = ZipfSampler(rng, len(REQUIREMENTS), 1.0)
+    answers_per_question = ZipfSampler(rng, 300, 2.0)
+
+    user_ids = range(first[User], first[User] + n_users)
+    _bulk_insert(
+        User,
+        ({"id": user_id, "email": f"user{user_id}@synthetic.dev", "is_admin": False, "created_at": anchor - span}
+         for user_id in user_ids),
+        "users",
+    )
+    _bulk_insert(
+        UserProfile,
+        ({"user_id": user_id, "budget_tier": rng.choice(list(BudgetTier)), "cities_of_experience": []}
+         for user_id in user_ids),
+        "profiles",
+    )
+    # Authorship is skewed too: low user ids are the power users
+    pick_user = ZipfSampler(rng, n_users, 0.9)
+
+    def requirements():
+        # dict, not set: set order depends on PYTHONHASHSEED and would break reproducibility
+        return list(dict.fromkeys(REQUIREMENTS[pick_requirement()] for _ in range(rng.randint(0, 4))))
+
+    question_created = array("d")
+    first_answer = array("q")
+    answer_count = array("i")
+
+    def questions():
+        for index in range(scale):
+            created_at = anchor - span + span * (index / scale) + timedelta(seconds=rng.randint(0, 3600))
+            question_created.append(created_at.timestamp())
+            yield {
+                "id": first[Question] + index,
+                "city_id": city_ids[pick_city()],
+                "topic_id": topic_ids[pick_topic()],
+                "author_id": first[User] + pick_user(),
+                "duration": rng.choice(["2 weeks", "1 month", "2 months", "3 months", "6 months"]),
+                "budget_tier": rng.choice(list(BudgetTier)),
+                "requirements": requirements(),
+                "question_text": _sentence(rng, rng.randint(6, 18)),
+                "status": QuestionStatus.open,
+                "created_at": created_at,
+                "last_activity_at": created_at,
+                "answer_count": 0,
+                "vote_score": 0,
+            }
+
+    _bulk_insert(Question, questions(), "questions")
+
+    def answers():
+        answer_id = first[Answer]
+        for index in range(scale):
+            count = answers_per_question()
+            first_answer.append(answer_id)
+            answer_count.append(count)
+            asked_at = datetime.fromtimestamp(question_created[index])
+            for _ in range(count):
+                yield {
+                    "id": answer_id,
+                    "question_id": first[Question] + index,
+                    "user_id": first[User] + pick_user(),
+                    "answer_text": _sentence(rng, rng.randint(10, 40)),
+                    "context": {},
+                    "created_at": asked_at + timedelta(minutes=rng.randint(5, 60 * 24 * 14)),
+                }
+                answer_id += 1
+
+    n_answers = _bulk_insert(Answer, answers(), "answers")
+
+    def cards():
+        for index in range(n_cards):
+            question = rng.randrange(scale)
+            yield {
+                "id": first[Card] + index,
+                "title": _sentence(rng, rng.randint(3, 7))[:-1],
+                "city_id": city_ids[pick_city()],
+                "topic_id": topic_ids[pick_topic()],
+                "duration": "1 month",
+                "budget_tier": rng.choice(list(BudgetTier)),
+                "requirements": requirements(),
+                "summary": _sentence(rng, 30),
+                "recommendations": [_sentence(rng, 8) for _ in range(3)],
+                "risks": [_sentence(rng, 6)],
+                "fit_for": ["Remote workers"],
+                "status": CardStatus.published if rng.random() < 0.8 else CardStatus.draft,
+                "updated_at": datetime.fromtimestamp(question_created[question]) + timedelta(days=14),
+            }
+
+    _bulk_insert(Card, cards(), "cards")
+
+    def card_sources():
+        for index in range(n_cards):
+            question = _recent(rng, 0, scale - 1)
+            for offset in range(min(answer_count[question], 3)):
+                yield {"card_id": first[Card] + index, "answer_id": first_answer[question] + offset}
+
+    _bulk_insert(CardSource, card_sources(), "card sources")
+
+    reaction_types, reaction_weights = zip(*REACTION_MIX)
+
+    def reactions():
+        last_answer = first[Answer] + n_answers - 1
+        for index in range(scale * 4):
+            kind = rng.random()
+            reaction_type = rng.choices(reaction_types, reaction_weights)[0]
+            if kind < 0.2 and reaction_type == ReactionType.thanks:
+                entity_type, entity_id = EntityType.question, first[Question] + _recent(rng, 0, scale - 1)
+            elif kind < 0.25 and reaction_type == ReactionType.saved:
+                entity_type, entity_id = EntityType.card, first[Card] + _recent(rng, 0, n_cards - 1)
+            elif n_answers:
+                entity_type, entity_id = EntityType.answer, _recent(rng, first[Answer], last_answer)
+            else:
+                continue
+            yield {
+                "id": first[Reaction] + index,
+                "user_id": first[User] + pick_user(),
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "reaction_type": reaction_type,
+                "created_at": anchor - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            }
+
+    _bulk_insert(Reaction, reactions(), "reactions")
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            for model in (City, Topic, User, UserProfile, Question, Answer, Card, CardSource, Reaction):
+                table = model.__tablename__
+                connection.execute(
+                    text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}")
+                )
+
+    print("  deriving thread stats, reputation and tags")
+    rebuild_thread_stats(db)
+    reconcile_user_stats(db)
+    backfill_tags(db)
+    print(f"Done in {time.monotonic() - started:.1f}s")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed demo data, or generate a synthetic dataset")
+    parser.add_argument("--scale", type=int, default=0, help="Also generate this many questions (about 10x rows in total)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for --scale")
+    parser.add_argument(
+        "--anchor", type=datetime.fromisoformat, default=datetime(2026, 1, 1),
+        help="Newest generated timestamp (ISO format); keep it fixed for reproducible data",
+    )
+    args = parser.parse_args()
     session = SessionLocal()
     try:
         seed(session)
         print("Database seeded successfully with expanded demo data!")
+        if args.scale > 0:
+            generate(session, args.scale, seed_value=args.seed, anchor=args.anchor)
     finally:
         session.close()